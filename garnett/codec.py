@@ -0,0 +1,128 @@
+"""
+The json codec used to encode and decode translated fields.
+
+GARNETT_JSON_CODEC picks the codec, one of "json" (the standard library),
+"orjson", "msgspec" or "auto" for the fastest one installed. A codec that
+isn't installed falls back to the standard library.
+"""
+
+from dataclasses import dataclass
+import importlib.util
+import json
+import logging
+from typing import Any, Callable, Optional, Tuple, Type
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JSON_CODEC = "json"
+
+# Codecs tried in order by "auto"
+FAST_JSON_CODECS = ("orjson", "msgspec")
+
+
+@dataclass(frozen=True)
+class JSONCodec:
+    """
+    A json encoder and decoder.
+    dumps always returns a str, default is called with objects the codec can't encode.
+    """
+
+    name: str
+    dumps: Callable[..., str]
+    loads: Callable[[Any], Any]
+    decode_errors: Tuple[Type[Exception], ...]
+
+
+def _stdlib_codec() -> JSONCodec:
+    def dumps(value, default=None) -> str:
+        return json.dumps(value, default=default)
+
+    return JSONCodec("json", dumps, json.loads, (json.JSONDecodeError,))
+
+
+def _orjson_codec() -> JSONCodec:
+    import orjson
+
+    def dumps(value, default=None) -> str:
+        # Pass datetimes to default so they are encoded the same way as django
+        option = orjson.OPT_PASSTHROUGH_DATETIME if default else 0
+        return orjson.dumps(value, default=default, option=option).decode()
+
+    return JSONCodec("orjson", dumps, orjson.loads, (orjson.JSONDecodeError,))
+
+
+def _msgspec_codec() -> JSONCodec:
+    import msgspec
+
+    encoder = msgspec.json.Encoder()
+    decoder = msgspec.json.Decoder()
+
+    def dumps(value, default=None) -> str:
+        if default is None:
+            return encoder.encode(value).decode()
+        # msgspec encodes dates and times itself, so default wouldn't be called with them
+        return json.dumps(value, default=default)
+
+    return JSONCodec("msgspec", dumps, decoder.decode, (msgspec.DecodeError,))
+
+
+JSON_CODECS = {
+    "json": _stdlib_codec,
+    "orjson": _orjson_codec,
+    "msgspec": _msgspec_codec,
+}
+
+_json_codec: Optional[JSONCodec] = None
+
+
+def _is_installed(name: str) -> bool:
+    return name == "json" or importlib.util.find_spec(name) is not None
+
+
+def _build_json_codec() -> JSONCodec:
+    name = getattr(settings, "GARNETT_JSON_CODEC", DEFAULT_JSON_CODEC)
+    if name == "auto":
+        name = next(
+            (codec for codec in FAST_JSON_CODECS if _is_installed(codec)), "json"
+        )
+    if name not in JSON_CODECS:
+        raise ImproperlyConfigured(
+            f"GARNETT_JSON_CODEC must be one of {', '.join(JSON_CODECS)} or auto"
+        )
+    if not _is_installed(name):
+        logger.warning(
+            "GARNETT_JSON_CODEC is %s but it isn't installed, using json", name
+        )
+        name = "json"
+    return JSON_CODECS[name]()
+
+
+def get_json_codec() -> JSONCodec:
+    """Return the json codec set by GARNETT_JSON_CODEC"""
+    global _json_codec
+    codec = _json_codec
+    if codec is None:
+        codec = _json_codec = _build_json_codec()
+    return codec
+
+
+def adapt_json_value(value, connection):
+    """Encode a value with the json codec in the format the database adapter expects"""
+    codec = get_json_codec()
+    if connection.vendor == "postgresql":
+        from django.db.backends.postgresql.psycopg_any import Jsonb
+
+        return Jsonb(value, dumps=codec.dumps)
+    return codec.dumps(value)
+
+
+@receiver(setting_changed)
+def _reset_json_codec(*, setting, **kwargs):
+    global _json_codec
+    if setting == "GARNETT_JSON_CODEC":
+        _json_codec = None
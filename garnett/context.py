@@ -5,6 +5,8 @@ from langcodes import Language
 # Internal context var should be set via set_field_language and get via get_current_language
 _ctx_language = contextvars.ContextVar("garnett_language")
 _ctx_force_blank = contextvars.ContextVar("garnett_language_blank")
+# Set via intern_translations, the table of translations loaded in the block
+_ctx_intern_table = contextvars.ContextVar("garnett_intern_table", default=None)
 
 
 class set_field_language(ContextDecorator):
@@ -24,3 +26,48 @@ class set_field_language(ContextDecorator):
     def __exit__(self, exc_type, exc_value, traceback):
         _ctx_language.reset(self.token)
         _ctx_force_blank.reset(self.token_blank)
+
+    # Setting the language doesn't block, so it can be used in async code
+    # without a thread switch, eg. `async with set_field_language("de"):`
+    async def __aenter__(self):
+        self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.__exit__(exc_type, exc_value, traceback)
+
+
+class TranslationInternTable(dict):
+    """Maps each translation to its first loaded copy, until max_size translations are stored"""
+
+    def __init__(self, max_size):
+        super().__init__()
+        self.max_size = max_size
+
+    def intern(self, value):
+        try:
+            return self[value]
+        except KeyError:
+            if len(self) < self.max_size:
+                self[value] = value
+            return value
+        except TypeError:
+            # Unhashable values from the inner field aren't interned
+            return value
+
+
+class intern_translations(ContextDecorator):
+    """
+    Share identical translations between the rows loaded in this block, eg. in an export job
+    where many rows repeat the same values. Language codes are always interned, and up
+    to max_size distinct translations are kept in a table that is discarded after the block.
+    """
+
+    def __init__(self, max_size=10_000):
+        self.max_size = max_size
+        self.token = None
+
+    def __enter__(self):
+        self.token = _ctx_intern_table.set(TranslationInternTable(self.max_size))
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _ctx_intern_table.reset(self.token)
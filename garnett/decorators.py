@@ -0,0 +1,37 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.decorators import decorator_from_middleware_with_args
+
+from garnett.middleware import (
+    TranslationPageCacheMiddleware,
+    patch_language_vary_headers,
+)
+
+
+def cache_page(timeout, *, cache=None, key_prefix=None):
+    """Like Django's cache_page, but caches the page once for each garnett language"""
+    return decorator_from_middleware_with_args(TranslationPageCacheMiddleware)(
+        page_timeout=timeout,
+        cache_alias=cache,
+        key_prefix=key_prefix,
+    )
+
+
+def vary_on_language(func):
+    """Add the request headers read by the language selectors to the Vary header of a view's response"""
+    if iscoroutinefunction(func):
+
+        async def _view_wrapper(request, *args, **kwargs):
+            response = await func(request, *args, **kwargs)
+            patch_language_vary_headers(response)
+            return response
+
+    else:
+
+        def _view_wrapper(request, *args, **kwargs):
+            response = func(request, *args, **kwargs)
+            patch_language_vary_headers(response)
+            return response
+
+    return wraps(func)(_view_wrapper)
@@ -1,7 +1,13 @@
-from django.db.models import F
-from django.db.models.fields.json import KeyTextTransform
+from django.db import NotSupportedError
+from django.db.models import F, Func, TextField, Value
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+from django.db.models.functions import Cast
 
-from garnett.utils import get_current_language_code
+from garnett.utils import (
+    get_current_language_code,
+    get_fallback_languages,
+    normalise_language_code,
+)
 from garnett.fields import TranslatedField
 
 
@@ -29,3 +35,124 @@ class L(KeyTextTransform):
 
     def __init__(self, *args, **kwargs):
         super().__init__(get_current_language_code(), *args, **kwargs)
+
+
+class TranslatedCoalesce(Func):
+    """Expression to return the text of a translated field with fallbacks
+
+    Returns the first language of the field that has a value, in the order
+    given or the fallback order of the current language, which matches the
+    text shown by NextTranslatedStr.
+    Use this to order or annotate by what users see, eg.:
+    Book.objects.order_by(TranslatedCoalesce("title"))
+    """
+
+    function = "COALESCE"
+
+    def __init__(self, expression, languages=None, **extra):
+        if isinstance(expression, str):
+            expression = F(expression)
+        if languages is None:
+            languages = get_fallback_languages()
+        self.languages = tuple(
+            dict.fromkeys(normalise_language_code(lang) for lang in languages)
+        )
+        extra.setdefault("output_field", TextField())
+        super().__init__(
+            *[KeyTextTransform(lang, expression) for lang in self.languages],
+            **extra,
+        )
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # Some databases require at least two arguments to coalesce
+        if len(self.source_expressions) == 1:
+            return compiler.compile(self.source_expressions[0])
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+class LanguageProjection(Func):
+    """Expression to select only some languages of a translated field
+
+    Missing languages are left out of the result rather than returned as null.
+    Databases without a json object builder select the whole field.
+    """
+
+    def __init__(self, expression, languages, **extra):
+        if isinstance(expression, str):
+            expression = F(expression)
+        self.languages = tuple(languages)
+        super().__init__(expression, **extra)
+
+    def get_pairs(self, transform):
+        field = self.source_expressions[0]
+        pairs = []
+        for language in self.languages:
+            pairs += [Cast(Value(language), TextField()), transform(language, field)]
+        return pairs
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return compiler.compile(self.source_expressions[0])
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        projection = Func(
+            Func(*self.get_pairs(KeyTransform), function="JSONB_BUILD_OBJECT"),
+            function="JSONB_STRIP_NULLS",
+        )
+        return compiler.compile(projection)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Merge patching removes any null values from missing languages
+        projection = Func(
+            Value("{}"),
+            Func(*self.get_pairs(KeyTextTransform), function="JSON_OBJECT"),
+            function="JSON_PATCH",
+        )
+        return compiler.compile(projection)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        projection = Func(
+            Value("{}"),
+            Func(*self.get_pairs(KeyTextTransform), function="JSON_OBJECT"),
+            function="JSON_MERGE_PATCH",
+        )
+        return compiler.compile(projection)
+
+
+class JSONMerge(Func):
+    """Expression to merge the keys of a json object into a json field
+
+    Databases without a json merge function write the default instead,
+    which should be the full value of the field.
+    """
+
+    def __init__(self, expression, value, default=None, **extra):
+        expressions = [expression, value] + ([default] if default is not None else [])
+        super().__init__(*expressions, **extra)
+
+    def as_merge(self, compiler, template):
+        field_sql, field_params = compiler.compile(self.source_expressions[0])
+        value_sql, value_params = compiler.compile(self.source_expressions[1])
+        sql = template % {"field": field_sql, "value": value_sql}
+        return sql, (*field_params, *value_params)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        if len(self.source_expressions) < 3:
+            raise NotSupportedError(
+                f"Merging json values is not supported on {connection.vendor}"
+            )
+        return compiler.compile(self.source_expressions[2])
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_merge(
+            compiler, "(COALESCE(%(field)s, '{}'::jsonb) || %(value)s::jsonb)"
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_merge(
+            compiler, "JSON_PATCH(COALESCE(%(field)s, '{}'), %(value)s)"
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_merge(
+            compiler, "JSON_MERGE_PATCH(COALESCE(%(field)s, '{}'), %(value)s)"
+        )
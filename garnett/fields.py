@@ -1,18 +1,38 @@
 from django.conf import settings
 from django.core import exceptions
-from django.db.models import JSONField
+from django.db import transaction
+from django.db.models import F, JSONField, Value
 from django.db.models.fields.json import KeyTransform
+from django.db.models.query_utils import DeferredAttribute
+from django.db.models.signals import class_prepared, post_init, post_save
+from django.dispatch import receiver
+from contextlib import nullcontext
+import contextvars
 from dataclasses import make_dataclass
 from functools import partial
 import logging
-from typing import Callable, Dict, Union
-
+import sys
+from typing import Callable, Dict, Iterable, List, Optional, Set, Union
+
+from garnett.codec import adapt_json_value, get_json_codec
+from garnett.context import _ctx_intern_table, set_field_language
+from garnett.indexes import (
+    INDEX_TYPES,
+    JSON_INDEX_TYPES,
+    SEARCH_INDEX_TYPES,
+    any_language_indexes,
+    language_indexes,
+)
 from garnett.translatedstr import TranslatedStr, VerboseTranslatedStr
 from garnett.utils import (
+    get_current_blank_override,
+    get_current_language,
     get_current_language_code,
     get_property_name,
+    get_language_registry,
     get_languages,
     is_valid_language,
+    normalise_language_code,
     normalise_language_codes,
 )
 
@@ -50,8 +70,285 @@ def innerfield_validator_factory(innerfield) -> callable:
     return validator
 
 
+TRANSLATOR_CACHE_ATTR = "_garnett_translator_cache"
+
+
+class TranslatorCache(dict):
+    """Per-instance cache of translated values, keyed by field name
+
+    The cached values are cheap to rebuild, so the cache is never copied or pickled
+    along with the instance.
+    """
+
+    def __reduce__(self):
+        return self.__class__, ()
+
+
+def get_translator_cache(instance) -> TranslatorCache:
+    try:
+        return instance.__dict__[TRANSLATOR_CACHE_ATTR]
+    except KeyError:
+        return instance.__dict__.setdefault(TRANSLATOR_CACHE_ATTR, TranslatorCache())
+
+
+def get_translator_key() -> tuple:
+    """
+    Return the key of values in translator caches for the current context.
+    Translated values only change with the context language, the blank override,
+    the configured languages or when the translations are changed.
+    """
+    return (
+        get_current_language(),
+        get_current_blank_override(),
+        get_language_registry(),
+    )
+
+
+def resolve_many(objs: Iterable, fields=None, language=None) -> list:
+    """
+    Resolve translated fields of many instances at once, eg. before rendering a list.
+    The language and its context are looked up once, and the translated values
+    are stored in each instance's translator cache so reading them is a lookup.
+
+    fields are names of translated fields (all of them by default), and language
+    is the language to resolve (the current language by default).
+    Deferred fields are left to be loaded and resolved when they're read.
+    """
+    objs = list(objs)
+    context = set_field_language(language) if language else nullcontext()
+    with context:
+        key = get_translator_key()
+        language_code = key[0].to_tag()
+        blank_override = key[1]
+        model_fields = {}
+        for obj in objs:
+            model = type(obj)
+            if model not in model_fields:
+                translatable = model._garnett_translatable_fields
+                model_fields[model] = [
+                    field
+                    for field in translatable
+                    if fields is None or field.name in fields
+                ]
+            cache = get_translator_cache(obj)
+            for field in model_fields[model]:
+                all_ts = obj.__dict__.get(field.attname)
+                if all_ts is None and has_lazy_translations(obj, field):
+                    all_ts = getattr(obj, field.attname)
+                if type(all_ts) is not dict:
+                    continue
+                value = field.translate(all_ts, language_code, blank_override)
+                cache[field.name] = (all_ts, dict(all_ts), key, value)
+    return objs
+
+
+PARTIAL_TRANSLATIONS_ATTR = "_garnett_partial_translations"
+
+
+def mark_partially_loaded(instance, field) -> None:
+    """Mark that only some languages of a field were loaded from the database"""
+    partial = instance.__dict__.setdefault(PARTIAL_TRANSLATIONS_ATTR, {})
+    partial[field.attname] = instance.__dict__[field.attname]
+
+
+def is_partially_loaded(instance, field) -> bool:
+    """Check if a field only holds some of its languages
+
+    This stops being true once a new dictionary is assigned to the field.
+    """
+    partial = instance.__dict__.get(PARTIAL_TRANSLATIONS_ATTR, {})
+    if field.attname not in partial:
+        return False
+    return partial[field.attname] is instance.__dict__.get(field.attname)
+
+
+CHANGED_LANGUAGES_ATTR = "_garnett_changed_languages"
+SNAPSHOT_ATTR = "_garnett_snapshot"
+
+
+class TranslationsSnapshot(dict):
+    """Per-instance record of the translations of each field as they are in the database
+
+    Entries are keyed by attname and only apply while the field holds the same
+    dictionary. Like the translator cache, it isn't pickled with the instance.
+    """
+
+    def __reduce__(self):
+        return self.__class__, ()
+
+
+def track_changed_language(instance, field, language_code: str) -> None:
+    """Record that one language of a field was changed through the field setter"""
+    all_ts = instance.__dict__.get(field.attname)
+    changed = instance.__dict__.setdefault(CHANGED_LANGUAGES_ATTR, {})
+    tracked = changed.get(field.attname)
+    if tracked is None or tracked[0] is not all_ts:
+        tracked = changed[field.attname] = (all_ts, set())
+    tracked[1].add(language_code)
+
+
+def get_changed_languages(instance, field) -> Optional[Set[str]]:
+    """Return the languages of a field changed through the field setter since it was saved
+
+    Returns None when this isn't known, ie. a new dictionary was assigned to the field.
+    """
+    changed = instance.__dict__.get(CHANGED_LANGUAGES_ATTR, {})
+    tracked = changed.get(field.attname)
+    if tracked is None or tracked[0] is not instance.__dict__.get(field.attname):
+        return None
+    return tracked[1]
+
+
+def snapshot_translations(instance, fields) -> None:
+    """Record the translations of fields as they are in the database"""
+    snapshot = instance.__dict__.get(SNAPSHOT_ATTR)
+    if snapshot is None:
+        snapshot = instance.__dict__[SNAPSHOT_ATTR] = TranslationsSnapshot()
+    for field in fields:
+        value = instance.__dict__.get(field.attname)
+        if type(value) is dict:
+            snapshot[field.attname] = (value, dict(value))
+        elif type(value) is LazyTranslations:
+            # Decoded again when it's compared
+            snapshot[field.attname] = (value, value)
+        else:
+            snapshot.pop(field.attname, None)
+
+
+def get_snapshot(instance, field) -> Optional[dict]:
+    """Return the translations of a field as they were loaded or last saved
+
+    Returns None when this isn't known, ie. a new dictionary was assigned to the field.
+    """
+    entry = instance.__dict__.get(SNAPSHOT_ATTR, {}).get(field.attname)
+    if entry is None or entry[0] is not instance.__dict__.get(field.attname):
+        return None
+    if type(entry[1]) is LazyTranslations:
+        return entry[1].decode()
+    return entry[1]
+
+
+def has_changed_translations(instance, field) -> bool:
+    """Check if the translations of a field changed since they were loaded or last saved"""
+    value = instance.__dict__.get(field.attname)
+    if value is None and has_lazy_translations(instance, field):
+        # Translations that haven't been decoded yet can't have changed
+        return False
+    entry = instance.__dict__.get(SNAPSHOT_ATTR, {}).get(field.attname)
+    if entry is None or entry[0] is not value:
+        return True
+    return get_snapshot(instance, field) != value
+
+
+def mark_translations_saved(instance, fields) -> Callable[[], None]:
+    """
+    Return a function that records the current translations of fields as saved.
+    It is run once the transaction commits, so a save that is rolled back
+    writes the same languages again when it is retried.
+    """
+    saved = []
+    for field in fields:
+        value = instance.__dict__.get(field.attname)
+        if type(value) is dict:
+            languages = get_changed_languages(instance, field)
+            saved.append((field.attname, value, dict(value), set(languages or ())))
+
+    def on_commit():
+        snapshot = instance.__dict__.get(SNAPSHOT_ATTR)
+        if snapshot is None:
+            snapshot = instance.__dict__[SNAPSHOT_ATTR] = TranslationsSnapshot()
+        changed = instance.__dict__.get(CHANGED_LANGUAGES_ATTR, {})
+        for attname, value, translations, languages in saved:
+            if instance.__dict__.get(attname) is not value:
+                continue
+            snapshot[attname] = (value, translations)
+            tracked = changed.get(attname)
+            if tracked is not None and tracked[0] is value:
+                tracked[1].difference_update(languages)
+
+    return on_commit
+
+
+# Set while TranslatedQuerySetMixin.lazy_translations() builds instances
+_ctx_lazy_translations = contextvars.ContextVar(
+    "garnett_lazy_translations", default=False
+)
+
+
+LAZY_TRANSLATIONS_ATTR = "_garnett_lazy_translations"
+
+
+class LazyTranslations:
+    """The undecoded database value of a translated field
+
+    Kept aside on an instance loaded with lazy_translations() until the field is
+    first read, copied or pickled.
+    """
+
+    __slots__ = ("field", "value", "expression", "connection")
+
+    def __init__(self, field, value, expression, connection):
+        self.field = field
+        self.value = value
+        self.expression = expression
+        self.connection = connection
+
+    def decode(self) -> dict:
+        return self.field.decode_db_value(self.value, self.expression, self.connection)
+
+    def __reduce__(self):
+        return dict, (self.decode(),)
+
+    def __deepcopy__(self, memo):
+        return self.decode()
+
+
+def stash_lazy_translations(instance, fields) -> None:
+    """Move undecoded translations out of the __dict__ of an instance until they're read
+
+    The translations attribute isn't a data descriptor, so it's only used while
+    the field isn't in the __dict__ of the instance.
+    """
+    stash = None
+    for field in fields:
+        if type(instance.__dict__.get(field.attname)) is LazyTranslations:
+            if stash is None:
+                stash = instance.__dict__.setdefault(LAZY_TRANSLATIONS_ATTR, {})
+            stash[field.attname] = instance.__dict__.pop(field.attname)
+
+
+def has_lazy_translations(instance, field) -> bool:
+    """Check if a field has undecoded translations waiting to be read"""
+    return field.attname in instance.__dict__.get(LAZY_TRANSLATIONS_ATTR, ())
+
+
+class TranslationsAttribute(DeferredAttribute):
+    """Descriptor for the translations of a field (<field>_tsall)
+
+    Like DeferredAttribute this is only used while the field isn't in the instance
+    __dict__, and decodes values loaded with lazy_translations() when they're first read.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        lazy = instance.__dict__.get(LAZY_TRANSLATIONS_ATTR, {}).pop(
+            self.field.attname, None
+        )
+        if lazy is None:
+            return super().__get__(instance, cls)
+        # Copied or pickled instances hold the decoded value
+        value = lazy.decode() if type(lazy) is LazyTranslations else lazy
+        instance.__dict__[self.field.attname] = value
+        snapshot = instance.__dict__.get(SNAPSHOT_ATTR, {})
+        entry = snapshot.get(self.field.attname)
+        if entry is not None and entry[0] is lazy:
+            snapshot[self.field.attname] = (value, lazy)
+        return value
+
+
 def translatable_default(
-    inner_default: Union[str, Callable[[], str]]
+    inner_default: Union[str, Callable[[], str]],
 ) -> Dict[str, str]:
     """Return default from inner field as dict with current language"""
     lang = get_current_language_code()
@@ -64,13 +361,47 @@ def translatable_default(
 class TranslatedField(JSONField):
     """Translated text field that mirrors the behaviour of another text field
 
-    All arguments except fallback can be provided on the inner field
+    All arguments except fallback, indexed_languages, index_types, index_fallbacks and
+    any_language_index_types can be provided on the inner field
+
+    indexed_languages is a list of language codes (or True for every language in
+    GARNETT_TRANSLATABLE_LANGUAGES) that get an expression index of each of index_types.
+    If index_fallbacks is true each language also gets indexes on its TranslatedCoalesce.
+    any_language_index_types are index types to create on the whole field, for any_lang
+    lookups or containment lookups (jsonb_path_ops) on Postgres.
     """
 
-    def __init__(self, field, *args, fallback=None, **kwargs):
+    descriptor_class = TranslationsAttribute
+
+    def __init__(
+        self,
+        field,
+        *args,
+        fallback=None,
+        indexed_languages=None,
+        index_types=("btree",),
+        index_fallbacks=False,
+        any_language_index_types=(),
+        **kwargs,
+    ):
         self.field = field
         self._fallback = fallback
 
+        for index_type in index_types:
+            if index_type not in INDEX_TYPES or index_type in JSON_INDEX_TYPES:
+                raise ValueError(
+                    f"Invalid index type for translatable field - {index_type}"
+                )
+        for index_type in any_language_index_types:
+            if index_type not in INDEX_TYPES or index_type in SEARCH_INDEX_TYPES:
+                raise ValueError(
+                    f"Invalid index type for translatable field - {index_type}"
+                )
+        self.indexed_languages = indexed_languages
+        self.index_types = tuple(index_types)
+        self.index_fallbacks = index_fallbacks
+        self.any_language_index_types = tuple(any_language_index_types)
+
         if type(fallback) is type and issubclass(fallback, TranslatedStr):
             self.fallback = fallback
         elif callable(fallback):
@@ -126,15 +457,89 @@ class TranslatedField(JSONField):
             return value
         return super().get_db_prep_save(value, connection)
 
+    def get_db_prep_value(self, value, connection, prepared=False):
+        """Encode the value with the json codec, unless the field has a custom encoder"""
+        if (
+            self.encoder is not None
+            or get_json_codec().name == "json"
+            or not hasattr(connection.ops, "adapt_json_value")
+        ):
+            return super().get_db_prep_value(value, connection, prepared)
+        if not prepared:
+            value = self.get_prep_value(value)
+        if isinstance(value, Value) and isinstance(value.output_field, JSONField):
+            value = value.value
+        elif hasattr(value, "as_sql"):
+            return value
+        return adapt_json_value(value, connection)
+
+    def pre_save(self, model_instance, add):
+        value = super().pre_save(model_instance, add)
+        if add or model_instance._state.adding or type(value) is not dict:
+            return value
+
+        changed = get_changed_languages(model_instance, self)
+        if changed and self.only_languages_changed(model_instance, value, changed):
+            # Only write the languages changed through the field setter
+            patch = {lang: value[lang] for lang in changed}
+        elif is_partially_loaded(model_instance, self):
+            # Only write the loaded languages so the others aren't lost
+            patch = value
+        else:
+            return value
+
+        from garnett.expressions import JSONMerge
+
+        return JSONMerge(
+            F(self.name),
+            Value(patch, output_field=self),
+            Value(value, output_field=self),
+        )
+
+    def only_languages_changed(self, model_instance, value, languages) -> bool:
+        """Check that the translations only differ from the saved ones in the given languages"""
+        snapshot = get_snapshot(model_instance, self)
+        if snapshot is None or not languages <= value.keys():
+            return False
+        return {k: v for k, v in value.items() if k not in languages} == {
+            k: v for k, v in snapshot.items() if k not in languages
+        }
+
     def from_db_value(self, value, expression, connection):
-        value = super().from_db_value(value, expression, connection)
+        if value is not None and _ctx_lazy_translations.get():
+            return LazyTranslations(self, value, expression, connection)
+        return self.decode_db_value(value, expression, connection)
+
+    def decode_db_value(self, value, expression, connection):
+        """Decode the json of a database value and convert each language with the inner field"""
+        codec = get_json_codec()
+        if self.decoder is not None or codec.name == "json":
+            value = super().from_db_value(value, expression, connection)
+        elif value is None:
+            return value
+        elif isinstance(value, str) or not isinstance(expression, KeyTransform):
+            try:
+                value = codec.loads(value)
+            except codec.decode_errors:
+                return value
         if hasattr(self.field, "from_db_value"):
             value = {
                 k: self.field.from_db_value(v, expression, connection)
                 for k, v in value.items()
             }
+        table = _ctx_intern_table.get()
+        if table is not None and type(value) is dict:
+            value = {sys.intern(k): table.intern(v) for k, v in value.items()}
         return value
 
+    def translate(self, content, language_code: str, blank_override: bool = False):
+        """Return the translated string of content in a language, like self.fallback(content)"""
+        if isinstance(self.fallback, partial):
+            return self.fallback.func.for_language(
+                content, language_code, blank_override, **self.fallback.keywords
+            )
+        return self.fallback.for_language(content, language_code, blank_override)
+
     def value_from_object(self, obj):
         """Return the value of this field in the given model instance."""
         all_ts = getattr(obj, self.ts_name)
@@ -168,6 +573,30 @@ class TranslatedField(JSONField):
     def ts_name(self):
         return f"{self.name}_tsall"
 
+    def get_indexed_languages(self) -> List[str]:
+        """Return the normalised codes of the languages that should be indexed"""
+        if self.indexed_languages is True:
+            if callable(getattr(settings, "GARNETT_TRANSLATABLE_LANGUAGES", None)):
+                raise exceptions.ImproperlyConfigured(
+                    "indexed_languages=True requires GARNETT_TRANSLATABLE_LANGUAGES to be a list of languages"
+                )
+            languages = [lang.to_tag() for lang in get_languages()]
+        else:
+            languages = [
+                normalise_language_code(lang) for lang in self.indexed_languages or []
+            ]
+        return list(dict.fromkeys(languages))
+
+    def get_language_indexes(self, model) -> list:
+        """Return the per-language expression indexes for this field on a model"""
+        return language_indexes(
+            model,
+            self,
+            self.get_indexed_languages(),
+            self.index_types,
+            fallbacks=self.index_fallbacks,
+        ) + any_language_indexes(model, self, self.any_language_index_types)
+
     def contribute_to_class(self, cls, name, private_only=False):
         super().contribute_to_class(cls, name, private_only)
 
@@ -176,13 +605,31 @@ class TranslatedField(JSONField):
 
         @property
         def translator(ego):
-            return self.fallback(getattr(ego, self.ts_name))
+            all_ts = getattr(ego, self.ts_name)
+            key = get_translator_key()
+            cache = get_translator_cache(ego)
+            cached = cache.get(name)
+            # A copy of the translations is kept to catch changes made in place
+            if (
+                cached is not None
+                and cached[0] is all_ts
+                and cached[2] == key
+                and cached[1] == all_ts
+            ):
+                return cached[3]
+
+            value = self.fallback(all_ts)
+            cache[name] = (all_ts, dict(all_ts), key, value)
+            return value
 
         @translator.setter
         def translator(ego, value):
             """Setter for main field (without _tsall)"""
             all_ts = getattr(ego, self.ts_name)
-            if not all_ts:
+            if all_ts is self.default:
+                # A dictionary default is shared by every new instance
+                all_ts = dict(all_ts)
+            elif not all_ts and type(all_ts) is not dict:
                 # This is probably the first save through
                 all_ts = {}
             elif type(all_ts) is not dict:
@@ -210,46 +657,13 @@ class TranslatedField(JSONField):
                 )
 
             setattr(ego, self.ts_name, all_ts)
+            # all_ts may have been changed in place, so drop the cached value
+            get_translator_cache(ego).pop(name, None)
+            if not isinstance(value, dict):
+                track_changed_language(ego, self, language_code)
 
         setattr(cls, f"{name}", translator)
 
-        # This can probably be cached on the class
-        @property
-        def translatable_fields(ego):
-            return [
-                field
-                for field in ego._meta.get_fields()
-                if isinstance(field, TranslatedField)
-            ]
-
-        propname = getattr(
-            settings, "GARNETT_TRANSLATABLE_FIELDS_PROPERTY_NAME", "translatable_fields"
-        )
-        setattr(cls, propname, translatable_fields)
-
-        @property
-        def translations(ego):
-            translatable_fields = ego.translatable_fields
-            Translations = make_dataclass(
-                "Translations", [(f.name, dict) for f in translatable_fields]
-            )
-            kwargs = {}
-            for field in translatable_fields:
-                kwargs[field.name] = getattr(ego, field.ts_name)
-            return Translations(**kwargs)
-
-        setattr(cls, get_property_name(), translations)
-
-        @property
-        def available_languages(ego):
-            """Returns a list of codes available on the whole model"""
-            langs = set()
-            for field in ego.translatable_fields:
-                langs |= getattr(ego, field.ts_name, {}).keys()
-            return [lang for lang in get_languages() if lang.to_tag() in langs]
-
-        setattr(cls, "available_languages", available_languages)
-
     def get_transform(self, name):
         # Call back to the Field get_transform
         transform = super(JSONField, self).get_transform(name)
@@ -284,5 +698,85 @@ class TranslatedKeyTransformFactory:
 Translated = TranslatedField
 
 
+# Model level helpers, these are added to any model with a TranslatedField
+# once the model class is prepared.
+
+
+def translatable_fields(ego):
+    return ego._garnett_translatable_fields
+
+
+def translations(ego):
+    return ego._garnett_translations_class(
+        *[getattr(ego, field.ts_name) for field in ego._garnett_translatable_fields]
+    )
+
+
+def available_languages(ego):
+    """Returns a list of codes available on the whole model"""
+    langs = set()
+    for field in ego._garnett_translatable_fields:
+        langs |= getattr(ego, field.ts_name, {}).keys()
+    registry = get_language_registry()
+    return [lang for tag, lang in registry.by_tag.items() if tag in langs]
+
+
+def snapshot_initial_translations(sender, instance, **kwargs):
+    snapshot_translations(instance, sender._garnett_translatable_fields)
+
+
+def translations_saved(sender, instance, using, update_fields, **kwargs):
+    fields = [
+        field
+        for field in sender._garnett_translatable_fields
+        if update_fields is None
+        or field.name in update_fields
+        or field.attname in update_fields
+    ]
+    if fields:
+        transaction.on_commit(mark_translations_saved(instance, fields), using=using)
+
+
+@receiver(class_prepared)
+def prepare_translatable_model(sender, **kwargs):
+    """Build the translatable field metadata once per model"""
+    fields = tuple(
+        field for field in sender._meta.fields if isinstance(field, TranslatedField)
+    )
+    if not fields:
+        return
+
+    sender._garnett_translatable_fields = fields
+    if getattr(sender, "_garnett_track_changes", False):
+        post_init.connect(snapshot_initial_translations, sender=sender)
+        post_save.connect(translations_saved, sender=sender)
+
+    # Indexes only go on the table that holds the field. Indexes of historical
+    # models come from the migration state, as the field options aren't deconstructed.
+    if not sender._meta.proxy:
+        existing = {index.name for index in sender._meta.indexes}
+        indexes = [
+            index
+            for field in sender._meta.local_fields
+            if isinstance(field, TranslatedField)
+            for index in field.get_language_indexes(sender)
+            if index.name not in existing
+        ]
+        if indexes:
+            sender._meta.indexes = [*sender._meta.indexes, *indexes]
+            # The migration autodetector only reads indexes declared in Meta
+            sender._meta.original_attrs["indexes"] = sender._meta.indexes
+    sender._garnett_translations_class = make_dataclass(
+        "Translations", [(field.name, dict) for field in fields], slots=True
+    )
+
+    propname = getattr(
+        settings, "GARNETT_TRANSLATABLE_FIELDS_PROPERTY_NAME", "translatable_fields"
+    )
+    setattr(sender, propname, property(translatable_fields))
+    setattr(sender, get_property_name(), property(translations))
+    setattr(sender, "available_languages", property(available_languages))
+
+
 # Import lookups here so that they are registered by just importing the field
 from garnett import lookups  # noqa: F401, E402
@@ -0,0 +1,169 @@
+"""
+Per-language expression indexes for translated fields.
+
+Each index is built on the expression garnett uses to read a single language
+from a translated field, ie. `(col ->> 'lang')` on Postgres, so that lookups
+and orderings on that language can use an index scan.
+Fallback indexes are built on the `TranslatedCoalesce` of a language instead,
+and any language indexes on the json text of the whole field.
+Search indexes are built on the `TranslatedSearchVector` of a language.
+"""
+
+from typing import Callable, Dict, Iterable, List
+
+from django.contrib.postgres.indexes import GinIndex, GistIndex, OpClass
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, router
+from django.db.backends.utils import names_digest, split_identifier
+from django.db.models import F, Index, TextField
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast, Upper
+
+
+def language_expression(field_name: str, language: str):
+    """Return the text of one language of a translated field"""
+    return KeyTextTransform(language, field_name)
+
+
+def fallback_expression(field_name: str, language: str):
+    """Return the text of a translated field shown in a language, with fallbacks"""
+    from garnett.expressions import TranslatedCoalesce
+    from garnett.utils import get_fallback_languages
+
+    return TranslatedCoalesce(field_name, get_fallback_languages(language))
+
+
+def json_text_expression(field_name: str):
+    """Return every language of a translated field as json text"""
+    return Cast(F(field_name), TextField())
+
+
+def search_vector_expression(field_name: str, language: str):
+    """Return the search vector of one language of a translated field"""
+    from garnett.search import TranslatedSearchVector, get_search_config
+
+    return TranslatedSearchVector(field_name, language, get_search_config(language))
+
+
+def btree_index(expression, name: str) -> Index:
+    """Supports exact and range lookups and ordering on a language"""
+    return Index(expression, name=name)
+
+
+def text_pattern_ops_index(expression, name: str) -> Index:
+    """Postgres only. Supports startswith lookups when the database doesn't use the C locale"""
+    return Index(OpClass(expression, name="text_pattern_ops"), name=name)
+
+
+def gin_trgm_index(expression, name: str) -> Index:
+    """Postgres only, requires pg_trgm. Supports contains, regex and trigram lookups"""
+    return GinIndex(OpClass(expression, name="gin_trgm_ops"), name=name)
+
+
+def gin_trgm_upper_index(expression, name: str) -> Index:
+    """Postgres only, requires pg_trgm. Supports icontains, iexact and istartswith lookups"""
+    return GinIndex(OpClass(Upper(expression), name="gin_trgm_ops"), name=name)
+
+
+def gist_trgm_index(expression, name: str) -> Index:
+    """Postgres only, requires pg_trgm. Supports ordering by trigram distance"""
+    return GistIndex(OpClass(expression, name="gist_trgm_ops"), name=name)
+
+
+def search_index(expression, name: str) -> Index:
+    """Postgres only, built on the search vector of a language. Supports search lookups"""
+    return GinIndex(expression, name=name)
+
+
+def jsonb_path_ops_index(expression, name: str) -> Index:
+    """Postgres only, for the whole field. Supports exact lookups with GARNETT_POSTGRES_CONTAINMENT_LOOKUPS"""
+    return GinIndex(OpClass(expression, name="jsonb_path_ops"), name=name)
+
+
+INDEX_TYPES: Dict[str, Callable[..., Index]] = {
+    "btree": btree_index,
+    "text_pattern_ops": text_pattern_ops_index,
+    "gin_trgm": gin_trgm_index,
+    "gin_trgm_upper": gin_trgm_upper_index,
+    "gist_trgm": gist_trgm_index,
+    "jsonb_path_ops": jsonb_path_ops_index,
+    "search": search_index,
+}
+
+# Databases that can build an index on the text of a json key
+INDEX_VENDORS = {"postgresql", "sqlite"}
+
+# Index types built on the json of the field rather than text
+JSON_INDEX_TYPES = {"jsonb_path_ops"}
+# Index types built on the search vector of a language rather than text
+SEARCH_INDEX_TYPES = {"search"}
+
+
+def language_index_name(
+    table_name: str, column: str, language: str, index_type: str
+) -> str:
+    """Generate a unique index name that fits within the 30 character limit"""
+    _, table_name = split_identifier(table_name)
+    digest = names_digest(table_name, column, language, index_type, length=6)
+    language = language.replace("-", "_").lower()
+    name = "_".join(
+        [table_name[:8].rstrip("_"), column[:6].rstrip("_"), language[:5], digest]
+    )
+    if name[0] == "_" or name[0].isdigit():
+        name = f"D{name[1:]}"
+    return name
+
+
+def check_index_vendor(model, field):
+    """Raise ImproperlyConfigured if the database of a model can't build language indexes"""
+    vendor = connections[router.db_for_write(model)].vendor
+    if vendor not in INDEX_VENDORS:
+        raise ImproperlyConfigured(
+            f"indexed_languages on {model._meta.label}.{field.name} isn't supported on {vendor}, "
+            "only on postgresql and sqlite"
+        )
+
+
+def language_indexes(
+    model,
+    field,
+    languages: Iterable[str],
+    index_types: Iterable[str],
+    fallbacks: bool = False,
+) -> List[Index]:
+    """Build the indexes for each language and index type of a translated field on a model"""
+    if languages and index_types:
+        check_index_vendor(model, field)
+    expressions = [("", language_expression)]
+    if fallbacks:
+        expressions.append(("_fallback", fallback_expression))
+    indexes = []
+    for language in languages:
+        for suffix, get_expression in expressions:
+            for index_type in index_types:
+                if index_type in SEARCH_INDEX_TYPES:
+                    if suffix:
+                        continue
+                    expression = search_vector_expression(field.name, language)
+                else:
+                    expression = get_expression(field.name, language)
+                name = language_index_name(
+                    model._meta.db_table, field.column, language, index_type + suffix
+                )
+                indexes.append(INDEX_TYPES[index_type](expression, name))
+    return indexes
+
+
+def any_language_indexes(model, field, index_types: Iterable[str]) -> List[Index]:
+    """Build the indexes on the json (or json text) of a whole translated field"""
+    indexes = []
+    for index_type in index_types:
+        if index_type in JSON_INDEX_TYPES:
+            expression = F(field.name)
+        else:
+            expression = json_text_expression(field.name)
+        name = language_index_name(
+            model._meta.db_table, field.column, "any", index_type
+        )
+        indexes.append(INDEX_TYPES[index_type](expression, name))
+    return indexes
@@ -1,11 +1,22 @@
-from django.db.models import lookups
+from django.conf import settings
+from django.db import NotSupportedError
+from django.db.models import Transform, TextField, lookups
+from django.db.models.expressions import RawSQL
 from django.db.models.fields import json, CharField
 from django.db.models.functions import Cast
 from django.db.models.fields.json import KeyTextTransform
 from django.contrib.postgres.lookups import SearchLookup, TrigramSimilar
-from django.contrib.postgres.search import TrigramSimilarity
-
+from django.contrib.postgres.search import (
+    SearchVector,
+    SearchVectorField,
+    TrigramDistance,
+    TrigramSimilarity,
+)
+
+from garnett.codec import get_json_codec
+from garnett.expressions import TranslatedCoalesce
 from garnett.fields import TranslatedField, TranslatedKeyTransform
+from garnett.search import get_search_config
 from garnett.utils import get_current_language
 
 
@@ -50,6 +61,40 @@ class HasAnyLangs(json.HasAnyKeys):
 # Override default lookups on our field to handle language lookups
 
 
+class TextLhsMixin:
+    """Mixin to compare the text of a language as a string
+
+    Postgres already returns text for a language, so the lhs is left as the
+    expression that language indexes are built on for the index to be used.
+    """
+
+    def process_lhs(self, compiler, connection, lhs=None):
+        if connection.vendor != "postgresql":
+            lhs = Cast(lhs or self.lhs, CharField())
+        return super().process_lhs(compiler, connection, lhs)
+
+
+class ContainmentMixin:
+    """Mixin to match a language using json containment on Postgres
+
+    With GARNETT_POSTGRES_CONTAINMENT_LOOKUPS enabled, exact lookups compile
+    to `col @> '{"lang": "value"}'` which can use a jsonb_path_ops GIN index
+    on the whole field instead of a per-language index.
+    """
+
+    def as_postgresql(self, compiler, connection):
+        key_transform = self.lhs
+        if (
+            getattr(settings, "GARNETT_POSTGRES_CONTAINMENT_LOOKUPS", False)
+            and isinstance(self.rhs, str)
+            and not isinstance(key_transform.lhs, json.KeyTransform)
+        ):
+            lhs_sql, lhs_params = compiler.compile(key_transform.lhs)
+            value = get_json_codec().dumps({key_transform.key_name: self.rhs})
+            return f"{lhs_sql} @> %s::jsonb", (*lhs_params, value)
+        return super().as_sql(compiler, connection)
+
+
 class CurrentLanguageMixin:
     """Mixin to perform language lookup on lhs"""
 
@@ -63,7 +108,10 @@ class CurrentLanguageMixin:
 
 @TranslatedField.register_lookup
 class BaseLanguageExact(
-    CurrentLanguageMixin, json.KeyTransformTextLookupMixin, lookups.Exact
+    ContainmentMixin,
+    CurrentLanguageMixin,
+    json.KeyTransformTextLookupMixin,
+    lookups.Exact,
 ):
     # Note: On some database engines lookup_name actually has an effect on the result
     # (See lookup_cast in the django postgres backend)
@@ -125,9 +173,10 @@ class KeyTransformContains(json.KeyTransformTextLookupMixin, lookups.Contains):
 
 
 @TranslatedKeyTransform.register_lookup
-class KeyTransformExact(json.KeyTransformTextLookupMixin, lookups.Exact):
+class KeyTransformExact(
+    ContainmentMixin, TextLhsMixin, json.KeyTransformTextLookupMixin, lookups.Exact
+):
     def process_lhs(self, compiler, connection):
-        self.lhs = Cast(self.lhs, CharField())
         return super().process_lhs(compiler, connection)
 
     def process_rhs(self, compiler, connection):
@@ -135,9 +184,10 @@ class KeyTransformExact(json.KeyTransformTextLookupMixin, lookups.Exact):
 
 
 @TranslatedKeyTransform.register_lookup
-class KeyTransformGreaterThan(json.KeyTransformTextLookupMixin, lookups.GreaterThan):
+class KeyTransformGreaterThan(
+    TextLhsMixin, json.KeyTransformTextLookupMixin, lookups.GreaterThan
+):
     def process_lhs(self, compiler, connection):
-        self.lhs = Cast(self.lhs, CharField())
         return super().process_lhs(compiler, connection)
 
     def process_rhs(self, compiler, connection):
@@ -146,10 +196,9 @@ class KeyTransformGreaterThan(json.KeyTransformTextLookupMixin, lookups.GreaterT
 
 @TranslatedKeyTransform.register_lookup
 class KeyTransformGreaterThanOrEqual(
-    json.KeyTransformTextLookupMixin, lookups.GreaterThanOrEqual
+    TextLhsMixin, json.KeyTransformTextLookupMixin, lookups.GreaterThanOrEqual
 ):
     def process_lhs(self, compiler, connection):
-        self.lhs = Cast(self.lhs, CharField())
         return super().process_lhs(compiler, connection)
 
     def process_rhs(self, compiler, connection):
@@ -157,9 +206,10 @@ class KeyTransformGreaterThanOrEqual(
 
 
 @TranslatedKeyTransform.register_lookup
-class KeyTransformLessThan(json.KeyTransformTextLookupMixin, lookups.LessThan):
+class KeyTransformLessThan(
+    TextLhsMixin, json.KeyTransformTextLookupMixin, lookups.LessThan
+):
     def process_lhs(self, compiler, connection):
-        self.lhs = Cast(self.lhs, CharField())
         return super().process_lhs(compiler, connection)
 
     def process_rhs(self, compiler, connection):
@@ -168,10 +218,9 @@ class KeyTransformLessThan(json.KeyTransformTextLookupMixin, lookups.LessThan):
 
 @TranslatedKeyTransform.register_lookup
 class KeyTransformLesshanOrEqual(
-    json.KeyTransformTextLookupMixin, lookups.LessThanOrEqual
+    TextLhsMixin, json.KeyTransformTextLookupMixin, lookups.LessThanOrEqual
 ):
     def process_lhs(self, compiler, connection):
-        self.lhs = Cast(self.lhs, CharField())
         return super().process_lhs(compiler, connection)
 
     def process_rhs(self, compiler, connection):
@@ -234,10 +283,12 @@ class BaseLanguageIRegex(CurrentLanguageMixin, json.KeyTransformIRegex):
 
 @TranslatedField.register_lookup
 class BaseLanguageGreaterThan(
-    CurrentLanguageMixin, json.KeyTransformTextLookupMixin, lookups.GreaterThan
+    TextLhsMixin,
+    CurrentLanguageMixin,
+    json.KeyTransformTextLookupMixin,
+    lookups.GreaterThan,
 ):
     def process_lhs(self, compiler, connection):
-        self.lhs = Cast(self.lhs, CharField())
         return super().process_lhs(compiler, connection)
 
     def process_rhs(self, compiler, connection):
@@ -246,10 +297,12 @@ class BaseLanguageGreaterThan(
 
 @TranslatedField.register_lookup
 class BaseLanguageGreaterThanOrEqual(
-    CurrentLanguageMixin, json.KeyTransformTextLookupMixin, lookups.GreaterThanOrEqual
+    TextLhsMixin,
+    CurrentLanguageMixin,
+    json.KeyTransformTextLookupMixin,
+    lookups.GreaterThanOrEqual,
 ):
     def process_lhs(self, compiler, connection):
-        self.lhs = Cast(self.lhs, CharField())
         return super().process_lhs(compiler, connection)
 
     def process_rhs(self, compiler, connection):
@@ -258,10 +311,12 @@ class BaseLanguageGreaterThanOrEqual(
 
 @TranslatedField.register_lookup
 class BaseLanguageLessThan(
-    CurrentLanguageMixin, json.KeyTransformTextLookupMixin, lookups.LessThan
+    TextLhsMixin,
+    CurrentLanguageMixin,
+    json.KeyTransformTextLookupMixin,
+    lookups.LessThan,
 ):
     def process_lhs(self, compiler, connection):
-        self.lhs = Cast(self.lhs, CharField())
         return super().process_lhs(compiler, connection)
 
     def process_rhs(self, compiler, connection):
@@ -270,10 +325,12 @@ class BaseLanguageLessThan(
 
 @TranslatedField.register_lookup
 class BaseLanguageLessThanOrEqual(
-    CurrentLanguageMixin, json.KeyTransformTextLookupMixin, lookups.LessThanOrEqual
+    TextLhsMixin,
+    CurrentLanguageMixin,
+    json.KeyTransformTextLookupMixin,
+    lookups.LessThanOrEqual,
 ):
     def process_lhs(self, compiler, connection):
-        self.lhs = Cast(self.lhs, CharField())
         return super().process_lhs(compiler, connection)
 
     def process_rhs(self, compiler, connection):
@@ -284,6 +341,257 @@ class BaseLanguageLessThanOrEqual(
 class BaseLanguageSearch(
     CurrentLanguageMixin, json.KeyTransformTextLookupMixin, SearchLookup
 ):
+    def process_lhs(self, compiler, connection):
+        # Unless a query gives a config, search with the config of the language
+        # so the search matches a TranslatedSearchVector index
+        if not isinstance(self.lhs.output_field, SearchVectorField) and not getattr(
+            self.rhs, "config", None
+        ):
+            self.lhs = SearchVector(
+                self.lhs, config=get_search_config(self.lhs.key_name)
+            )
+        return super().process_lhs(compiler, connection)
+
+    def process_rhs(self, compiler, connection):
+        return super().process_rhs(compiler, connection)
+
+
+# Lookups on the value shown with fallbacks, ie. title__fb_icontains="thing"
+# These use the same expression as TranslatedCoalesce, so can use fallback indexes
+
+
+class FallbackMixin:
+    """Mixin to perform lookups on the fallback value of the current language
+
+    These are registered with an fb_ prefix, but keep the name of the lookup
+    they extend as databases use it to find the lookup operator.
+    """
+
+    def __init__(self, lhs, *args, **kwargs):
+        super().__init__(TranslatedCoalesce(lhs), *args, **kwargs)
+
+
+class FallbackExact(FallbackMixin, lookups.Exact):
+    def process_lhs(self, compiler, connection):
+        return super().process_lhs(compiler, connection)
+
+    def process_rhs(self, compiler, connection):
+        return super().process_rhs(compiler, connection)
+
+
+class FallbackIExact(FallbackMixin, lookups.IExact):
+    def process_lhs(self, compiler, connection):
+        return super().process_lhs(compiler, connection)
+
+    def process_rhs(self, compiler, connection):
+        return super().process_rhs(compiler, connection)
+
+
+class FallbackContains(FallbackMixin, lookups.Contains):
+    def process_lhs(self, compiler, connection):
+        return super().process_lhs(compiler, connection)
+
+    def process_rhs(self, compiler, connection):
+        return super().process_rhs(compiler, connection)
+
+
+class FallbackIContains(FallbackMixin, lookups.IContains):
+    def process_lhs(self, compiler, connection):
+        return super().process_lhs(compiler, connection)
+
+    def process_rhs(self, compiler, connection):
+        return super().process_rhs(compiler, connection)
+
+
+class FallbackStartsWith(FallbackMixin, lookups.StartsWith):
+    def process_lhs(self, compiler, connection):
+        return super().process_lhs(compiler, connection)
+
+    def process_rhs(self, compiler, connection):
+        return super().process_rhs(compiler, connection)
+
+
+class FallbackIStartsWith(FallbackMixin, lookups.IStartsWith):
+    def process_lhs(self, compiler, connection):
+        return super().process_lhs(compiler, connection)
+
+    def process_rhs(self, compiler, connection):
+        return super().process_rhs(compiler, connection)
+
+
+TranslatedField.register_lookup(FallbackExact, lookup_name="fb_exact")
+TranslatedField.register_lookup(FallbackIExact, lookup_name="fb_iexact")
+TranslatedField.register_lookup(FallbackContains, lookup_name="fb_contains")
+TranslatedField.register_lookup(FallbackIContains, lookup_name="fb_icontains")
+TranslatedField.register_lookup(FallbackStartsWith, lookup_name="fb_startswith")
+TranslatedField.register_lookup(FallbackIStartsWith, lookup_name="fb_istartswith")
+
+
+# Lookups on every language of a field, ie. title__any_lang__icontains="thing"
+# These check each translation in a subquery over the json object
+
+
+@TranslatedField.register_lookup
+class AnyLanguage(Transform):
+    """Transform to match any language of a translated field in a lookup"""
+
+    lookup_name = "any_lang"
+    output_field = TextField()
+
+    def as_sql(self, compiler, connection):
+        raise NotSupportedError(
+            "any_lang can only be used in a lookup, eg. title__any_lang__icontains"
+        )
+
+
+class AnyLanguageMixin:
+    """Mixin to perform a lookup against each value of a translated field
+
+    On Postgres, text matching lookups first check the whole field as text, so
+    they can use an any_language_index_types index before checking each value.
+    """
+
+    alias = "garnett_lang"
+    # LIKE patterns that match the json text of a field containing the value
+    json_text_patterns = {
+        "exact": '%%"%s"%%',
+        "iexact": '%%"%s"%%',
+        "contains": "%%%s%%",
+        "icontains": "%%%s%%",
+        "startswith": '%%"%s%%',
+        "istartswith": '%%"%s%%',
+    }
+
+    def process_lhs(self, compiler, connection, lhs=None):
+        qn = connection.ops.quote_name
+        value = RawSQL(f"{qn(self.alias)}.{qn('value')}", [], TextField())
+        return super().process_lhs(compiler, connection, lhs or value)
+
+    def as_subquery(self, compiler, connection, template):
+        field_sql, field_params = compiler.compile(self.lhs.lhs)
+        predicate, predicate_params = super().as_sql(compiler, connection)
+        sql = template % {
+            "field": field_sql,
+            "alias": connection.ops.quote_name(self.alias),
+            "value": connection.ops.quote_name("value"),
+            "predicate": predicate,
+        }
+        return f"EXISTS ({sql})", (*field_params, *predicate_params)
+
+    def get_json_text_pattern(self, connection):
+        """
+        Return a LIKE pattern for the field as json text, if the lookup value is
+        written the same way in json
+        """
+        pattern = self.json_text_patterns.get(self.lookup_name)
+        if pattern is None or not isinstance(self.rhs, str):
+            return None
+        if any(char in '"\\' or ord(char) < 32 for char in self.rhs):
+            return None
+        return pattern % connection.ops.prep_for_like_query(self.rhs)
+
+    def as_sql(self, compiler, connection):
+        raise NotSupportedError(
+            f"Lookups on any language aren't supported on {connection.vendor}"
+        )
+
+    def as_postgresql(self, compiler, connection):
+        sql, params = self.as_subquery(
+            compiler,
+            connection,
+            "SELECT 1 FROM JSONB_EACH_TEXT(%(field)s) AS %(alias)s WHERE %(predicate)s",
+        )
+        pattern = self.get_json_text_pattern(connection)
+        if pattern is None:
+            return sql, params
+        field_sql, field_params = compiler.compile(self.lhs.lhs)
+        if self.lookup_name.startswith("i"):
+            text_sql = f"UPPER(({field_sql})::text) LIKE UPPER(%s)"
+        else:
+            text_sql = f"({field_sql})::text LIKE %s"
+        return f"({text_sql} AND {sql})", (*field_params, pattern, *params)
+
+    def as_sqlite(self, compiler, connection):
+        return self.as_subquery(
+            compiler,
+            connection,
+            "SELECT 1 FROM JSON_EACH(%(field)s) AS %(alias)s WHERE %(predicate)s",
+        )
+
+    def as_mysql(self, compiler, connection):
+        return self.as_subquery(
+            compiler,
+            connection,
+            "SELECT 1 FROM JSON_TABLE(%(field)s, '$.*' COLUMNS (%(value)s LONGTEXT PATH '$')) "
+            "AS %(alias)s WHERE %(predicate)s",
+        )
+
+
+@AnyLanguage.register_lookup
+class AnyLanguageExact(AnyLanguageMixin, lookups.Exact):
+    def process_lhs(self, compiler, connection):
+        return super().process_lhs(compiler, connection)
+
+    def process_rhs(self, compiler, connection):
+        return super().process_rhs(compiler, connection)
+
+
+@AnyLanguage.register_lookup
+class AnyLanguageIExact(AnyLanguageMixin, lookups.IExact):
+    def process_lhs(self, compiler, connection):
+        return super().process_lhs(compiler, connection)
+
+    def process_rhs(self, compiler, connection):
+        return super().process_rhs(compiler, connection)
+
+
+@AnyLanguage.register_lookup
+class AnyLanguageContains(AnyLanguageMixin, lookups.Contains):
+    def process_lhs(self, compiler, connection):
+        return super().process_lhs(compiler, connection)
+
+    def process_rhs(self, compiler, connection):
+        return super().process_rhs(compiler, connection)
+
+
+@AnyLanguage.register_lookup
+class AnyLanguageIContains(AnyLanguageMixin, lookups.IContains):
+    def process_lhs(self, compiler, connection):
+        return super().process_lhs(compiler, connection)
+
+    def process_rhs(self, compiler, connection):
+        return super().process_rhs(compiler, connection)
+
+
+@AnyLanguage.register_lookup
+class AnyLanguageStartsWith(AnyLanguageMixin, lookups.StartsWith):
+    def process_lhs(self, compiler, connection):
+        return super().process_lhs(compiler, connection)
+
+    def process_rhs(self, compiler, connection):
+        return super().process_rhs(compiler, connection)
+
+
+@AnyLanguage.register_lookup
+class AnyLanguageIStartsWith(AnyLanguageMixin, lookups.IStartsWith):
+    def process_lhs(self, compiler, connection):
+        return super().process_lhs(compiler, connection)
+
+    def process_rhs(self, compiler, connection):
+        return super().process_rhs(compiler, connection)
+
+
+@AnyLanguage.register_lookup
+class AnyLanguageRegex(AnyLanguageMixin, lookups.Regex):
+    def process_lhs(self, compiler, connection):
+        return super().process_lhs(compiler, connection)
+
+    def process_rhs(self, compiler, connection):
+        return super().process_rhs(compiler, connection)
+
+
+@AnyLanguage.register_lookup
+class AnyLanguageIRegex(AnyLanguageMixin, lookups.IRegex):
     def process_lhs(self, compiler, connection):
         return super().process_lhs(compiler, connection)
 
@@ -313,3 +621,12 @@ class LangTrigramSimilarity(TrigramSimilarity):
         lang = str(get_current_language())
         expression = KeyTextTransform(lang, expression)
         super().__init__(expression, string, **extra)
+
+
+class LangTrigramDistance(TrigramDistance):
+    # Compiles to the <-> operator on the current language, so ordering by this
+    # can use a gist_trgm index on the language as a nearest neighbour scan.
+    def __init__(self, expression, string, **extra):
+        lang = str(get_current_language())
+        expression = KeyTextTransform(lang, expression)
+        super().__init__(expression, string, **extra)
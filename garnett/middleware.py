@@ -1,51 +1,255 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
-from django.http import Http404
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import FileResponse, Http404
+from django.middleware.cache import (
+    CacheMiddleware,
+    FetchFromCacheMiddleware,
+    UpdateCacheMiddleware,
+)
+from django.utils.cache import patch_vary_headers
 from django.utils.module_loading import import_string
 from django.utils.translation import gettext as _
 
+from contextlib import contextmanager
+from contextvars import ContextVar
 import logging
 import langcodes
 from langcodes import Language
+from typing import Callable, Optional, Tuple
 
-from .utils import is_valid_language, get_default_language
+from .utils import (
+    is_valid_language,
+    get_default_language,
+    get_current_blank_override,
+    get_current_language_code,
+    get_language_registry,
+    get_valid_base_language,
+    parse_unknown_language_tag,
+)
 from .context import set_field_language
+from .selectors import (
+    LANGUAGE_SESSION_KEY,
+    SELECTOR_VARY_HEADERS,
+    SIGNED_LANGUAGE_COOKIE_NAME,
+    SIGNED_LANGUAGE_COOKIE_SALT,
+    signed_cookie,
+)
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_LANGUAGE_SELECTORS = [
+    "garnett.selectors.header",
+    "garnett.selectors.query",
+    "garnett.selectors.cookie",
+]
 
-class TranslationContextMiddleware:
+# Settings read by TranslationContextMiddleware when it is created
+MIDDLEWARE_SETTINGS = {
+    "GARNETT_REQUEST_LANGUAGE_SELECTORS",
+    "GARNETT_ALLOW_BLANK_FALLBACK_OVERRIDE",
+    "GARNETT_FORCE_BLANK_FALLBACK_OVERRIDE_PATHS",
+}
+
+_language_selectors: Optional[Tuple[Callable, ...]] = None
+
+# The cache key prefix of the request being handled by a language cache middleware
+_ctx_cache_key_prefix: ContextVar[Optional[str]] = ContextVar(
+    "garnett_cache_key_prefix", default=None
+)
+
+
+def get_language_selectors() -> Tuple[Callable, ...]:
+    """Return the functions of GARNETT_REQUEST_LANGUAGE_SELECTORS, imported once"""
+    global _language_selectors
+    selectors = _language_selectors
+    if selectors is None:
+        paths = getattr(
+            settings, "GARNETT_REQUEST_LANGUAGE_SELECTORS", DEFAULT_LANGUAGE_SELECTORS
+        )
+        selectors = _language_selectors = tuple(import_string(path) for path in paths)
+    return selectors
+
+
+def parse_language_tag(tag: str) -> Language:
+    """Return the language of a tag from a request"""
+    language = get_language_registry().by_tag.get(tag)
+    if language is None:
+        language = parse_unknown_language_tag(tag)
+    return language
+
+
+def get_language_display_names(language: Language) -> Tuple[str, str]:
+    """
+    Return the name of a language in itself and in English, for error messages.
+    Only the valid subtags of a language that isn't translatable are named,
+    so naming the languages of requests is bounded.
+    """
+    tag = language.to_tag()
+    if tag not in get_language_registry().tags:
+        language = get_valid_base_language(language)
+        if language is None:
+            return tag, tag
+    return language.display_name(language), language.display_name()
+
+
+def get_language_cache_key(request=None) -> str:
+    """
+    Return the part of a cache key for the garnett language of a request,
+    or of the current context, and whether fallbacks are blank
+    """
+    language = getattr(request, "garnett_language", None)
+    if language is None:
+        language, blank = get_current_language_code(), get_current_blank_override()
+    else:
+        blank = getattr(request, "garnett_fallback_blank", False)
+    return f"garnett.{language}.blank" if blank else f"garnett.{language}"
+
+
+def get_language_vary_headers(selectors=None) -> Tuple[str, ...]:
+    """Return the request headers read by the language selectors"""
+    if selectors is None:
+        selectors = get_language_selectors()
+    headers = {}
+    for selector in selectors:
+        vary_headers = getattr(
+            selector, "vary_headers", SELECTOR_VARY_HEADERS.get(selector, ())
+        )
+        headers.update(dict.fromkeys(vary_headers))
+    return tuple(headers)
+
+
+def patch_language_vary_headers(response, selectors=None):
+    """Add the request headers read by the language selectors to the Vary header of a response"""
+    # Django sets an empty Vary header when there are no headers
+    if headers := get_language_vary_headers(selectors):
+        patch_vary_headers(response, headers)
+
+
+@receiver(setting_changed)
+def _reset_language_selectors(*, setting, **kwargs):
+    # Connected before any middleware is created, so it runs before they rebuild
+    global _language_selectors
+    if setting == "GARNETT_REQUEST_LANGUAGE_SELECTORS":
+        _language_selectors = None
+
+
+def language_streaming_content(content, language, force_blank=False):
+    """Wrap the content of a streaming response so it is generated in a language"""
+    iterator = iter(content)
+    while True:
+        with set_field_language(language, force_blank=force_blank):
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+        yield chunk
+
+
+async def async_language_streaming_content(content, language, force_blank=False):
+    """Wrap the async content of a streaming response so it is generated in a language"""
+    iterator = aiter(content)
+    while True:
+        async with set_field_language(language, force_blank=force_blank):
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                return
+        yield chunk
+
+
+class HybridMiddleware:
+    """
+    A middleware that runs without a thread switch under both WSGI and ASGI.
+    Django calls it with a coroutine get_response under ASGI, where __call__ returns a coroutine.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+class TranslationContextMiddleware(HybridMiddleware):
     """
     This middleware catches the requested "garnett language" and:
      * sets a garnett language attribute on the request
-     * defines a context variable that is used when reading or altering fields
+     * defines a context variable that is used when reading or altering fields,
+       including while the content of a streaming response is generated
     """
 
     def __init__(self, get_response):
-        self.get_response = get_response
+        super().__init__(get_response)
+        self.load_settings()
+        # Weakly connected, so this is disconnected with the middleware
+        setting_changed.connect(self.on_setting_changed)
+
+    def load_settings(self):
+        """Bind the selectors and settings used on each request"""
+        self.selectors = get_language_selectors()
+        self.allow_blank_override = getattr(
+            settings, "GARNETT_ALLOW_BLANK_FALLBACK_OVERRIDE", False
+        )
+        self.force_blank_paths = tuple(
+            getattr(settings, "GARNETT_FORCE_BLANK_FALLBACK_OVERRIDE_PATHS", [])
+        )
+
+    def on_setting_changed(self, *, setting, **kwargs):
+        if setting in MIDDLEWARE_SETTINGS:
+            self.load_settings()
 
     def validate(self, language):
         """Validate the language raising http errors if invalid"""
         return None
 
-    def __call__(self, request):
-        request.garnett_language = get_language_from_request(request)
+    def set_request_language(self, request):
+        request.garnett_language = get_language_from_request(request, self.selectors)
         request.garnett_fallback_blank = False
-        if getattr(settings, "GARNETT_ALLOW_BLANK_FALLBACK_OVERRIDE", False):
+        if self.allow_blank_override:
             request.garnett_fallback_blank = bool(request.GET.get("gblank", False))
-        elif paths := getattr(
-            settings, "GARNETT_FORCE_BLANK_FALLBACK_OVERRIDE_PATHS", []
-        ):
-            for path in paths:
-                if request.path.startswith(path):
-                    request.garnett_fallback_blank = True
-                    break
+        elif self.force_blank_paths and request.path.startswith(self.force_blank_paths):
+            request.garnett_fallback_blank = True
 
         self.validate(request.garnett_language)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        self.set_request_language(request)
         with set_field_language(
             request.garnett_language, force_blank=request.garnett_fallback_blank
         ):
             response = self.get_response(request)
-            return response
+        return self.wrap_streaming_content(request, response)
+
+    async def __acall__(self, request):
+        self.set_request_language(request)
+        async with set_field_language(
+            request.garnett_language, force_blank=request.garnett_fallback_blank
+        ):
+            response = await self.get_response(request)
+        return self.wrap_streaming_content(request, response)
+
+    def wrap_streaming_content(self, request, response):
+        """Generate the content of a streaming response in the request language"""
+        # Files don't use the language, and wrapping them would stop them using sendfile
+        if response.streaming and not isinstance(response, FileResponse):
+            if getattr(response, "is_async", False):
+                wrap = async_language_streaming_content
+            else:
+                wrap = language_streaming_content
+            response.streaming_content = wrap(
+                response.streaming_content,
+                request.garnett_language,
+                request.garnett_fallback_blank,
+            )
+        return response
 
 
 class TranslationContextNotFoundMiddleware(TranslationContextMiddleware):
@@ -58,9 +262,7 @@ class TranslationContextNotFoundMiddleware(TranslationContextMiddleware):
 
     def validate(self, language):
         if not is_valid_language(language):
-            lang_obj = language
-            lang_name = lang_obj.display_name(language)
-            lang_en_name = lang_obj.display_name()
+            lang_name, lang_en_name = get_language_display_names(language)
             raise Http404(
                 _("This server does not support %(lang_name)s" " [%(lang_en_name)s].")
                 % {
@@ -70,42 +272,155 @@ class TranslationContextNotFoundMiddleware(TranslationContextMiddleware):
             )
 
 
-class TranslationCacheMiddleware:
+class TranslationCacheMiddleware(HybridMiddleware):
     """Middleware to cache the garnett language in the users session storage
 
+    The language tag is saved before the view runs, so the view sees it in the session.
+    It's only saved when it changes, so requests in the same language don't save
+    the session or resend its cookie.
     This must be after one of the above middlewares and after the session middleware
     """
 
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
-        if hasattr(request, "garnett_language") and hasattr(request, "session"):
-            request.session["GARNETT_LANGUAGE_CODE"] = request.garnett_language
-        else:
+    def cache_language(self, request):
+        """Cache the language of a request before it's handled"""
+        if not hasattr(request, "garnett_language") or not hasattr(request, "session"):
             logger.error(
                 "TranslationCacheMiddleware must come after main garnett middleware "
                 "and the session middleware."
             )
+            return
+        tag = str(request.garnett_language)
+        # Setting a key marks the session as modified, even to the same value
+        if request.session.get(LANGUAGE_SESSION_KEY) != tag:
+            request.session[LANGUAGE_SESSION_KEY] = tag
+
+    def cache_language_in_response(self, request, response):
+        """Cache the language of a request in its response"""
+        return None
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        self.cache_language(request)
+        response = self.get_response(request)
+        self.cache_language_in_response(request, response)
+        return response
+
+    async def __acall__(self, request):
+        self.cache_language(request)
+        response = await self.get_response(request)
+        self.cache_language_in_response(request, response)
+        return response
+
+
+class TranslationSignedCookieCacheMiddleware(TranslationCacheMiddleware):
+    """Middleware to cache the garnett language in a signed cookie
+
+    Use with the garnett.selectors.signed_cookie selector. The cookie is only set
+    when the language changes and uses Django's LANGUAGE_COOKIE_* settings.
+    This must be after one of the above middlewares
+    """
+
+    def cache_language(self, request):
+        return None
+
+    def cache_language_in_response(self, request, response):
+        if not hasattr(request, "garnett_language"):
+            logger.error(
+                "TranslationSignedCookieCacheMiddleware must come after main garnett middleware."
+            )
+            return
+        tag = str(request.garnett_language)
+        if signed_cookie(request) != tag:
+            response.set_signed_cookie(
+                SIGNED_LANGUAGE_COOKIE_NAME,
+                tag,
+                salt=SIGNED_LANGUAGE_COOKIE_SALT,
+                max_age=settings.LANGUAGE_COOKIE_AGE,
+                path=settings.LANGUAGE_COOKIE_PATH,
+                domain=settings.LANGUAGE_COOKIE_DOMAIN,
+                secure=settings.LANGUAGE_COOKIE_SECURE,
+                httponly=settings.LANGUAGE_COOKIE_HTTPONLY,
+                samesite=settings.LANGUAGE_COOKIE_SAMESITE,
+            )
+
+
+class LanguageCacheKeyMixin:
+    """
+    Adds the garnett language of the request to the key prefix of Django's cache middleware,
+    so a page is cached once for each language.
+    """
+
+    @property
+    def key_prefix(self):
+        return _ctx_cache_key_prefix.get() or self.base_key_prefix
+
+    @key_prefix.setter
+    def key_prefix(self, value):
+        self.base_key_prefix = value
+
+    @contextmanager
+    def language_key_prefix(self, request):
+        key = get_language_cache_key(request)
+        prefix = f"{self.base_key_prefix}.{key}" if self.base_key_prefix else key
+        token = _ctx_cache_key_prefix.set(prefix)
+        try:
+            yield
+        finally:
+            _ctx_cache_key_prefix.reset(token)
+
+
+class TranslationUpdateCacheMiddleware(LanguageCacheKeyMixin, UpdateCacheMiddleware):
+    """
+    Django's UpdateCacheMiddleware, caching a page once for each garnett language and
+    adding the headers read by the language selectors to the Vary header for other caches.
+
+    This must be first, like UpdateCacheMiddleware, with one of the garnett
+    context middleware before TranslationFetchFromCacheMiddleware.
+    """
+
+    def process_response(self, request, response):
+        with self.language_key_prefix(request):
+            response = super().process_response(request, response)
+        # The language is already in the cache key, so these headers are added after
+        # it is learned. Otherwise, eg. Vary: Cookie would cache the page for each visitor.
+        patch_language_vary_headers(response)
+        return response
+
+
+class TranslationFetchFromCacheMiddleware(
+    LanguageCacheKeyMixin, FetchFromCacheMiddleware
+):
+    """
+    Django's FetchFromCacheMiddleware, fetching the page cached for the garnett language.
+
+    This must be last, like FetchFromCacheMiddleware, after one of the garnett context middleware.
+    """
+
+    def process_request(self, request):
+        with self.language_key_prefix(request):
+            response = super().process_request(request)
+        if response is not None:
+            patch_language_vary_headers(response)
+        return response
+
+
+class TranslationPageCacheMiddleware(
+    TranslationUpdateCacheMiddleware,
+    TranslationFetchFromCacheMiddleware,
+    CacheMiddleware,
+):
+    """Django's CacheMiddleware, caching a page once for each garnett language"""
+
 
-        return self.get_response(request)
-
-
-def get_language_from_request(request) -> Language:
-    opt_order = getattr(
-        settings,
-        "GARNETT_REQUEST_LANGUAGE_SELECTORS",
-        [
-            "garnett.selectors.header",
-            "garnett.selectors.query",
-            "garnett.selectors.cookie",
-        ],
-    )
-    for opt in opt_order:
-        func = import_string(opt)
-        if lang := func(request):
+def get_language_from_request(request, selectors=None) -> Language:
+    """Return the language of a request from the first selector that finds one"""
+    if selectors is None:
+        selectors = get_language_selectors()
+    for selector in selectors:
+        if lang := selector(request):
             try:
-                return Language.get(lang)
+                return parse_language_tag(lang)
             except langcodes.tag_parser.LanguageTagError:
                 raise Http404(
                     _(
@@ -1,9 +1,9 @@
 import base64
-import json
 import pickle
 from django.apps.registry import Apps
 from django.db.migrations import RunPython
 from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from garnett.codec import get_json_codec
 from garnett.utils import get_current_language_code
 from typing import Callable, Dict, List
 
@@ -59,11 +59,11 @@ def _get_migrate_function(
 
 def update_safe_encode_content_forwards(current_lang: str, value: str) -> str:
     value = safe_encode(value)
-    return json.dumps({current_lang: value})
+    return get_json_codec().dumps({current_lang: value})
 
 
 def update_safe_encode_content_backwards(current_lang: str, value: str) -> str:
-    value = json.loads(value)
+    value = get_json_codec().loads(value)
     return safe_decode(value.get(current_lang, safe_encode("")))
 
 
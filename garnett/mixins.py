@@ -1,7 +1,27 @@
-from django.db.models.query import BaseIterable
-from garnett.expressions import L
+from django.contrib.postgres.search import TrigramDistance
+from django.db import router
+from django.db.models import F, Value
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.query import BaseIterable, ModelIterable
+from garnett.expressions import JSONMerge, L, LanguageProjection
+from garnett.fields import (
+    LAZY_TRANSLATIONS_ATTR,
+    LazyTranslations,
+    _ctx_lazy_translations,
+    has_changed_translations,
+    mark_partially_loaded,
+    resolve_many,
+    snapshot_translations,
+    stash_lazy_translations,
+)
+from garnett.utils import (
+    get_current_language_code,
+    get_language_registry,
+    normalise_language_code,
+)
 
 PREFIX = "L_garnett__"
+PROJECTION_PREFIX = "_garnett_projected_"
 
 
 class TranslatableValuesIterable(BaseIterable):
@@ -32,6 +52,54 @@ class TranslatableValuesIterable(BaseIterable):
             yield {self.clean_garnett_field(names[i]): row[i] for i in indexes}
 
 
+class LanguageProjectionIterable(ModelIterable):
+    """
+    Iterable returned by QuerySet.only_languages() that moves the selected
+    languages onto each translated field and marks them as partially loaded.
+    """
+
+    def __iter__(self):
+        model = self.queryset.model
+        projections = [
+            (alias, model._meta.get_field(alias[len(PROJECTION_PREFIX) :]))
+            for alias, annotation in self.queryset.query.annotations.items()
+            if isinstance(annotation, LanguageProjection)
+            and alias.startswith(PROJECTION_PREFIX)
+        ]
+        for obj in super().__iter__():
+            for alias, field in projections:
+                obj.__dict__[field.attname] = obj.__dict__.pop(alias)
+                mark_partially_loaded(obj, field)
+            yield obj
+
+
+class LazyTranslationsIterable(ModelIterable):
+    """
+    Iterable returned by QuerySet.lazy_translations() that leaves translated
+    fields undecoded until they're read.
+    """
+
+    def __iter__(self):
+        fields = self.queryset.model._garnett_translatable_fields
+        annotations = list(self.queryset.query.annotation_select)
+        objects = super().__iter__()
+        while True:
+            # Only set while building instances, so other queries aren't affected
+            token = _ctx_lazy_translations.set(True)
+            try:
+                obj = next(objects)
+            except StopIteration:
+                return
+            finally:
+                _ctx_lazy_translations.reset(token)
+            stash_lazy_translations(obj, fields)
+            for name in annotations:
+                value = obj.__dict__.get(name)
+                if type(value) is LazyTranslations:
+                    obj.__dict__[name] = value.decode()
+            yield obj
+
+
 class TranslatedQuerySetMixin:
     """
     A translated QuerySet mixin to add extra functionality to translated fields
@@ -60,3 +128,174 @@ class TranslatedQuerySetMixin:
         clone._iterable_class = TranslatableValuesIterable
 
         return clone
+
+    def only_languages(self, *languages, fallbacks=False):
+        """
+        Only load some languages of translated fields, the current language is used if none are given.
+        If fallbacks is true the fallback chain of each language is also loaded, up to the default language.
+
+        Saving an instance only writes the loaded languages of these fields,
+        unless a new dictionary of translations is assigned to the field.
+        """
+        languages = [normalise_language_code(lang) for lang in languages] or [
+            get_current_language_code()
+        ]
+        if fallbacks:
+            registry = get_language_registry()
+            for language in list(languages):
+                chain = registry.fallbacks(language)
+                if registry.default_tag in chain:
+                    chain = chain[: chain.index(registry.default_tag) + 1]
+                languages.extend(chain)
+        languages = list(dict.fromkeys(languages))
+
+        fields = self.model._garnett_translatable_fields
+        clone = self.defer(*[field.name for field in fields]).annotate(
+            **{
+                f"{PROJECTION_PREFIX}{field.name}": LanguageProjection(
+                    field.name, languages
+                )
+                for field in fields
+            }
+        )
+        if clone._iterable_class is ModelIterable:
+            clone._iterable_class = LanguageProjectionIterable
+        return clone
+
+    def lazy_translations(self):
+        """
+        Don't decode translated fields until they're read from an instance.
+        This saves decoding translations that are never used, eg. in a list of other fields.
+        Until then they're treated like deferred fields, so save() doesn't write them.
+        """
+        clone = self._chain()
+        if clone._iterable_class is ModelIterable:
+            clone._iterable_class = LazyTranslationsIterable
+        return clone
+
+    def resolved_translations(self, *fields, language=None):
+        """
+        Resolve translated fields of every instance once they're fetched, with resolve_many().
+        Takes the names of the translated fields to resolve (all of them if none are given)
+        and the language to resolve them in (the current language when fetched by default).
+        Like prefetch_related(), this doesn't apply to iterator().
+        """
+        clone = self._chain()
+        clone._garnett_resolve = (fields or None, language)
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._garnett_resolve = getattr(self, "_garnett_resolve", None)
+        return clone
+
+    def _fetch_all(self):
+        fetched = self._result_cache is not None
+        super()._fetch_all()
+        resolve = getattr(self, "_garnett_resolve", None)
+        if resolve and not fetched and issubclass(self._iterable_class, ModelIterable):
+            fields, language = resolve
+            resolve_many(self._result_cache, fields=fields, language=language)
+
+    def update_translation(self, field_name, language, value):
+        """
+        Update one language of a translated field on every row, without loading them.
+        Returns the number of rows matched.
+        """
+        field = self.model._meta.get_field(field_name)
+        patch = {normalise_language_code(language): value}
+        return self.update(
+            **{field.name: JSONMerge(F(field.name), Value(patch, output_field=field))}
+        )
+
+    def trigram_nearest(self, **field):
+        """
+        Order by trigram distance to a text, nearest first. Postgres only, requires pg_trgm.
+        Takes one field, eg. .trigram_nearest(title="garnet") for the current language
+        or .trigram_nearest(title__de="granat"), and annotates the distance as trigram_distance.
+        With a gist_trgm index on the language, slicing this runs as a nearest neighbour index scan.
+        """
+        if len(field) != 1:
+            raise TypeError("trigram_nearest() takes exactly one field")
+        ((name, text),) = field.items()
+        field_name, _, language = name.partition("__")
+        language = normalise_language_code(language or get_current_language_code())
+        expression = KeyTextTransform(language, field_name)
+        return self.annotate(
+            trigram_distance=TrigramDistance(expression, text)
+        ).order_by("trigram_distance")
+
+
+class TranslatedModelMixin:
+    """
+    A model mixin that tracks changes to translated fields.
+    Translations are snapshotted when an instance is loaded and once a save is committed,
+    so that save() only writes the translated fields that were changed since then.
+    Must be mixedin to a Model
+    """
+
+    # Read when the model class is prepared, to connect the snapshot signals
+    _garnett_track_changes = True
+
+    def refresh_from_db(self, using=None, fields=None, *args, **kwargs):
+        refreshed = self._garnett_translatable_fields
+        if fields is not None:
+            refreshed = [
+                field
+                for field in refreshed
+                if field.name in fields or field.attname in fields
+            ]
+        # Undecoded translations would be stale, so they're loaded again when read
+        lazy = self.__dict__.get(LAZY_TRANSLATIONS_ATTR, {})
+        for field in refreshed:
+            lazy.pop(field.attname, None)
+        super().refresh_from_db(using, fields, *args, **kwargs)
+        snapshot_translations(self, refreshed)
+
+    def snapshot_translations(self):
+        """Record the current translations of the loaded translated fields"""
+        snapshot_translations(self, self._garnett_translatable_fields)
+
+    def get_changed_translated_fields(self) -> list:
+        """Return the translated fields that have changed since the last snapshot"""
+        return [
+            field
+            for field in self._garnett_translatable_fields
+            if has_changed_translations(self, field)
+        ]
+
+    def get_translated_update_fields(self, using=None):
+        """
+        Return the fields a plain save() of this instance needs to write, skipping
+        translated fields that haven't changed. Returns None when every field
+        needs to be saved, eg. for new instances or ones without a primary key.
+        """
+        using = using or router.db_for_write(self.__class__, instance=self)
+        if self._state.adding or self.pk is None or using != self._state.db:
+            return None
+        loaded = [
+            field
+            for field in self._garnett_translatable_fields
+            if field.attname in self.__dict__
+        ]
+        changed = {field for field in loaded if has_changed_translations(self, field)}
+        if len(changed) == len(loaded):
+            return None
+        return frozenset(
+            field.attname
+            for field in self._meta.concrete_fields
+            if not field.primary_key
+            and not getattr(field, "generated", False)
+            and field.attname in self.__dict__
+            and (field in changed or field not in self._garnett_translatable_fields)
+        )
+
+    def save(self, *args, **kwargs):
+        # Like saving a deferred instance, only update the changed fields.
+        # Saves with positional arguments are left to Django.
+        if not args and kwargs.get("update_fields") is None:
+            if not kwargs.get("force_insert"):
+                update_fields = self.get_translated_update_fields(kwargs.get("using"))
+                if update_fields is not None:
+                    kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
@@ -0,0 +1,125 @@
+"""
+Full text search on translated fields (Postgres only).
+
+Each language is searched with its own text search config, ie. `german` for `de`,
+so words are stemmed correctly, and so the search vector of a language can be
+indexed or stored in a generated column.
+"""
+
+from typing import Optional, Union
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+)
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F
+from django.db.models.fields.json import KeyTextTransform
+from langcodes import Language
+
+from garnett.utils import get_current_language_code, normalise_language_code
+
+# The text search configs included with Postgres, by language subtag
+SEARCH_CONFIGS = {
+    "ar": "arabic",
+    "da": "danish",
+    "de": "german",
+    "el": "greek",
+    "en": "english",
+    "es": "spanish",
+    "fi": "finnish",
+    "fr": "french",
+    "ga": "irish",
+    "hu": "hungarian",
+    "id": "indonesian",
+    "it": "italian",
+    "lt": "lithuanian",
+    "nb": "norwegian",
+    "ne": "nepali",
+    "nl": "dutch",
+    "no": "norwegian",
+    "pt": "portuguese",
+    "ro": "romanian",
+    "ru": "russian",
+    "sv": "swedish",
+    "ta": "tamil",
+    "tr": "turkish",
+}
+
+DEFAULT_SEARCH_CONFIG = "simple"
+
+
+def get_search_config(language: Union[str, Language]) -> str:
+    """
+    Return the Postgres text search config for a language.
+    GARNETT_SEARCH_CONFIGS can add or override configs by language code,
+    languages without a config use the "simple" config.
+    """
+    tag = normalise_language_code(language)
+    configs = {
+        normalise_language_code(lang): config
+        for lang, config in getattr(settings, "GARNETT_SEARCH_CONFIGS", {}).items()
+    }
+    if tag in configs:
+        return configs[tag]
+    subtag = Language.get(tag).language
+    return configs.get(subtag, SEARCH_CONFIGS.get(subtag, DEFAULT_SEARCH_CONFIG))
+
+
+class TranslatedSearchVector(SearchVector):
+    """Search vector of one language of a translated field
+
+    Uses the text search config of the language, and the current language if
+    none is given. This is the same expression title__search uses, so
+    indexes and generated columns built on it are used by searches.
+    """
+
+    def __init__(self, expression, language=None, config=None, weight=None, **extra):
+        if isinstance(expression, str):
+            expression = F(expression)
+        if language is None:
+            language = get_current_language_code()
+        self.language = normalise_language_code(language)
+        super().__init__(
+            KeyTextTransform(self.language, expression),
+            config=config or get_search_config(self.language),
+            weight=weight,
+            **extra,
+        )
+
+
+class TranslatedSearchRank(SearchRank):
+    """Rank the search of one language of a translated field
+
+    Text queries are parsed with the text search config of the language.
+    """
+
+    def __init__(self, expression, query, language=None, **extra):
+        vector = TranslatedSearchVector(expression, language)
+        if not hasattr(query, "resolve_expression"):
+            query = SearchQuery(query, config=get_search_config(vector.language))
+        super().__init__(vector, query, **extra)
+
+
+def search_vector_field(field_name: str, language: str, config: Optional[str] = None):
+    """
+    Return a generated field that stores the search vector of one language
+    of a translated field, eg. title_de_search = search_vector_field("title", "de").
+    Requires Django 5.0 or later.
+    """
+    try:
+        from django.db.models import GeneratedField
+    except ImportError:
+        raise ImproperlyConfigured("search_vector_field requires Django 5.0 or later")
+
+    language = normalise_language_code(language)
+    return GeneratedField(
+        expression=TranslatedSearchVector(
+            field_name, language, config or get_search_config(language)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
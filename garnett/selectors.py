@@ -1,6 +1,29 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import langcodes
 from django.utils.translation import get_language
 
-from garnett.utils import lang_param
+from garnett.utils import (
+    get_language_registry,
+    get_valid_base_language,
+    lang_param,
+    parent_tags,
+    parse_unknown_language_tag,
+)
+
+# The session key and cookie names the language is read from, and cached to by TranslationCacheMiddleware
+LANGUAGE_SESSION_KEY = "GARNETT_LANGUAGE_CODE"
+LANGUAGE_COOKIE_NAME = "GARNETT_LANGUAGE_CODE"
+SIGNED_LANGUAGE_COOKIE_NAME = "GARNETT_SIGNED_LANGUAGE_CODE"
+SIGNED_LANGUAGE_COOKIE_SALT = "garnett.selectors.signed_cookie"
+
+# Longer headers are cut off before parsing, like Django does
+ACCEPT_LANGUAGE_HEADER_MAX_LENGTH = 500
+# The largest langcodes distance between a requested and a supported language that still matches
+ACCEPT_LANGUAGE_MAX_DISTANCE = 25
+# The number of distinct Accept-Language headers whose match is cached
+ACCEPT_LANGUAGE_CACHE_SIZE = 256
 
 
 def query(request):
@@ -8,11 +31,18 @@ def query(request):
 
 
 def cookie(request):
-    return request.COOKIES.get("GARNETT_LANGUAGE_CODE", None)
+    return request.COOKIES.get(LANGUAGE_COOKIE_NAME, None)
+
+
+def signed_cookie(request):
+    """Return the language cached by TranslationSignedCookieCacheMiddleware, if it wasn't tampered with"""
+    return request.get_signed_cookie(
+        SIGNED_LANGUAGE_COOKIE_NAME, default=None, salt=SIGNED_LANGUAGE_COOKIE_SALT
+    )
 
 
 def session(request):
-    return request.session.get("GARNETT_LANGUAGE_CODE", None)
+    return request.session.get(LANGUAGE_SESSION_KEY, None)
 
 
 def header(request):
@@ -21,3 +51,82 @@ def header(request):
 
 def browser(request):
     return get_language()
+
+
+def accept_language(request):
+    """Return the translatable language that best matches the Accept-Language header"""
+    accept = request.META.get("HTTP_ACCEPT_LANGUAGE")
+    if not accept:
+        return None
+    return match_accept_language(
+        accept[:ACCEPT_LANGUAGE_HEADER_MAX_LENGTH],
+        tuple(get_language_registry().by_tag),
+    )
+
+
+def parse_accept_language(accept: str) -> List[str]:
+    """Return the languages of an Accept-Language header, most preferred first"""
+    weighted = []
+    for position, item in enumerate(accept.split(",")):
+        tag, _, params = item.strip().partition(";")
+        tag = tag.strip()
+        quality = 1.0
+        params = params.strip()
+        if params:
+            name, _, value = params.partition("=")
+            if name.strip() != "q":
+                continue
+            try:
+                quality = float(value)
+            except ValueError:
+                continue
+        if not tag or tag == "*" or not 0 < quality <= 1:
+            continue
+        weighted.append((-quality, position, tag))
+    return [tag for _, _, tag in sorted(weighted)]
+
+
+@lru_cache(maxsize=ACCEPT_LANGUAGE_CACHE_SIZE)
+def match_accept_language(accept: str, tags: Tuple[str, ...]) -> Optional[str]:
+    """
+    Return the tag that best matches an Accept-Language header: the requested tag or one of
+    its parents, or else the closest by BCP-47 distance.
+    Matching is slow, so the result is cached for each header and set of tags.
+    """
+    for language in parse_accept_language(accept):
+        if language in tags:
+            return language
+        try:
+            requested = parse_unknown_language_tag(language)
+        except langcodes.tag_parser.LanguageTagError:
+            continue
+        requested_tag = requested.to_tag()
+        for tag in (requested_tag, *parent_tags(requested_tag)):
+            if tag in tags:
+                return tag
+        # langcodes keeps every language it matches, so only valid subtags are matched
+        base = get_valid_base_language(requested)
+        if base is None:
+            continue
+        try:
+            tag, _ = langcodes.closest_match(
+                base.to_tag(), tags, max_distance=ACCEPT_LANGUAGE_MAX_DISTANCE
+            )
+        except (langcodes.tag_parser.LanguageTagError, ValueError):
+            continue
+        if tag in tags:
+            return tag
+    return None
+
+
+# The request headers each selector reads, added to the Vary header of cached pages.
+# A custom selector can set a vary_headers attribute instead.
+SELECTOR_VARY_HEADERS = {
+    query: (),
+    cookie: ("Cookie",),
+    signed_cookie: ("Cookie",),
+    session: ("Cookie",),
+    header: ("X-Garnett-Language-Code",),
+    browser: ("Accept-Language", "Cookie"),
+    accept_language: ("Accept-Language",),
+}
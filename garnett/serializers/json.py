@@ -1,10 +1,46 @@
 from django.core.serializers import json
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.serializers.python import Deserializer as PythonDeserializer
+from garnett.codec import get_json_codec
 from garnett.serializers.base import TranslatableSerializer
 
 
 class Serializer(TranslatableSerializer, json.Serializer):
-    pass
+    def end_object(self, obj):
+        # Use the json codec unless there are options only the standard library supports
+        codec = get_json_codec()
+        options = {
+            name: value
+            for name, value in self.json_kwargs.items()
+            if value is not None and name != "ensure_ascii"
+        }
+        if (
+            codec.name == "json"
+            or options != {"cls": DjangoJSONEncoder}
+            or self.json_kwargs.get("ensure_ascii")
+        ):
+            return super().end_object(obj)
+
+        if not self.first:
+            self.stream.write(", ")
+        encoder = DjangoJSONEncoder()
+        self.stream.write(codec.dumps(self.get_dump_object(obj), encoder.default))
+        self._current = None
 
 
 def Deserializer(stream_or_string, **options):
-    yield from json.Deserializer(stream_or_string, **options)
+    codec = get_json_codec()
+    if codec.name == "json":
+        yield from json.Deserializer(stream_or_string, **options)
+        return
+
+    if not isinstance(stream_or_string, (bytes, str)):
+        stream_or_string = stream_or_string.read()
+    try:
+        objects = codec.loads(stream_or_string)
+        yield from PythonDeserializer(objects, **options)
+    except (GeneratorExit, DeserializationError):
+        raise
+    except Exception as exc:
+        raise DeserializationError() from exc
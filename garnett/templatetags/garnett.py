@@ -1,4 +1,6 @@
 from django import template
+from django.templatetags.cache import CacheNode
+from garnett.middleware import get_language_cache_key
 from garnett.utils import lang_param
 from langcodes import Language
 
@@ -33,3 +35,43 @@ def language_selector(context, selector):
         "garnett_languages": context["garnett_languages"],
         "garnett_current_language": context["garnett_current_language"],
     }
+
+
+class CurrentLanguageKey:
+    """Resolves to the garnett language, so fragments are cached once for each language"""
+
+    def resolve(self, context):
+        return get_language_cache_key()
+
+
+@register.tag("garnett_cache")
+def do_garnett_cache(parser, token):
+    """
+    Like Django's {% cache %} tag, but caches the fragment once for each garnett language.
+
+    Usage::
+
+        {% load garnett %}
+        {% garnett_cache [expire_time] [fragment_name] [var1] [var2] .. using="cachename" %}
+            .. some expensive processing ..
+        {% endgarnett_cache %}
+    """
+    nodelist = parser.parse(("endgarnett_cache",))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            "'%r' tag requires at least 2 arguments." % tokens[0]
+        )
+    if len(tokens) > 3 and tokens[-1].startswith("using="):
+        cache_name = parser.compile_filter(tokens[-1].removeprefix("using="))
+        tokens = tokens[:-1]
+    else:
+        cache_name = None
+    return CacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],  # fragment_name can't be a variable.
+        [*(parser.compile_filter(t) for t in tokens[3:]), CurrentLanguageKey()],
+        cache_name,
+    )
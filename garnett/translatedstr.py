@@ -1,17 +1,45 @@
+from contextlib import nullcontext
+from functools import cached_property, lru_cache
 from typing import Tuple, Optional, Callable
-from django.utils.translation import gettext as _
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.translation import gettext as _, get_language as get_ui_language
 
 from langcodes import Language
+from garnett.context import set_field_language
 from garnett.utils import (
     codes_to_langs,
     get_current_language,
     get_current_language_code,
     get_current_blank_override,
-    get_languages,
+    get_language_registry,
 )
 from garnett import exceptions as e
 
 
+@lru_cache(maxsize=256)
+def get_missing_translation_message(ui_language: Optional[str], tag: str) -> str:
+    """
+    Return the message shown when a field has no translation in a language.
+    Building it looks up language names, so it is cached for each
+    UI language (the active Django language, which it is translated into) and language.
+    """
+    language = Language.get(tag)
+    message = _(
+        "No translation of this field available in %(lang_name)s [%(lang_en_name)s]."
+    )
+    return message % {
+        "lang_name": language.display_name(language),
+        "lang_en_name": language.display_name(),
+    }
+
+
+@receiver(setting_changed)
+def _clear_missing_translation_messages(*, setting, **kwargs):
+    if setting in {"LANGUAGES", "LANGUAGE_CODE", "LOCALE_PATHS"}:
+        get_missing_translation_message.cache_clear()
+
+
 class HTMLTranslationMixin:
     def __html__(self) -> str:
         # Add leading [lang] wrapped in a span
@@ -36,13 +64,35 @@ class TranslatedStr(str):
     how a string was generated and the language of the string.
     """
 
+    # Most strings are not fallbacks, so these are only stored on the instance when they differ.
+    # Instances of a str subclass can't use __slots__, so this keeps their __dict__ small.
+    is_fallback = False
+    fallback_language = None
+
     def __new__(cls, content, fallback: Callable = None):
+        return cls.for_language(
+            content,
+            get_current_language_code(),
+            get_current_blank_override(),
+            fallback,
+        )
+
+    @classmethod
+    def for_language(
+        cls,
+        content,
+        current_language_code: str,
+        blank_override: bool = False,
+        fallback: Callable = None,
+    ):
+        """
+        Build the string for a language without reading the current language.
+        Fallbacks are run with current_language_code as the current language.
+        """
         try:
-            current_language_code = get_current_language_code()
             has_current_language = current_language_code in content.keys()
         except (AttributeError, TypeError):
             raise e.LanguageStructureError
-        blank_override = get_current_blank_override()
 
         if has_current_language:
             fallback_language = None
@@ -50,20 +100,32 @@ class TranslatedStr(str):
         else:
             if blank_override:
                 return ""
-            elif fallback:
-                fallback_language, text = fallback(content)
+            # Fallbacks read the current language, so run them in this one
+            if current_language_code == get_current_language_code():
+                context = nullcontext()
             else:
-                fallback_language, text = cls.get_fallback_text(content)
-
-        instance = super().__new__(cls, text)
+                context = set_field_language(current_language_code)
+            with context:
+                if fallback:
+                    fallback_language, text = fallback(content)
+                else:
+                    fallback_language, text = cls.get_fallback_text(content)
+
+        instance = str.__new__(cls, text)
         instance.content = content
-        instance.translations = codes_to_langs(content)
-        instance.is_fallback = not has_current_language
-        instance.fallback_language = fallback_language
+        if not has_current_language:
+            instance.is_fallback = True
+            instance.fallback_language = fallback_language
         return instance
 
+    @cached_property
+    def translations(self) -> dict:
+        """All translations keyed by `Language`, this is only built when first used"""
+        return codes_to_langs(self.content)
+
     @classmethod
     def get_fallback_text(cls, content) -> Tuple[Optional[Language], str]:
+        """Return the language and text shown when content has no translation in the current language"""
         return None, ""
 
     # TODO: Implmement the above logic in __str__
@@ -80,32 +142,24 @@ class VerboseTranslatedStr(TranslatedStr):
     def get_fallback_text(cls, content):
         """Default fallback function that returns an error message"""
         language = get_current_language()
-        lang_name = language.display_name(language)
-        lang_en_name = language.display_name()
-
-        return language, content.get(
-            language.to_tag(),
-            _(
-                "No translation of this field available in %(lang_name)s"
-                " [%(lang_en_name)s]."
-            )
-            % {
-                "lang_name": lang_name,
-                "lang_en_name": lang_en_name,
-            },
-        )
+        tag = language.to_tag()
+        if tag in content:
+            return language, content[tag]
+        return language, get_missing_translation_message(get_ui_language(), tag)
 
 
 class NextTranslatedStr(TranslatedStr, HTMLTranslationMixin):
     """
-    A translated string that falls back based on the order of preferred languages in the app.
+    A translated string that falls back through the fallback chain of the current language,
+    see GARNETT_FALLBACK_CHAINS.
     """
 
     @classmethod
     def get_fallback_text(cls, content):
         """Fallback that checks each language consecutively"""
-        for lang in get_languages():
-            if lang.to_tag() in content:
-                return lang, content[lang.to_tag()]
+        registry = get_language_registry()
+        for tag in registry.fallbacks(get_current_language_code()):
+            if tag in content:
+                return registry.by_tag.get(tag) or Language.get(tag), content[tag]
 
         return None, ""
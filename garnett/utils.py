@@ -1,8 +1,14 @@
-from typing import List, Union, Optional
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple, Union
+import time
 
 import langcodes.tag_parser
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from langcodes import Language
 
 from garnett.context import _ctx_language, _ctx_force_blank
@@ -45,15 +51,51 @@ def normalise_language_codes(value):
     return {normalise_language_code(lang): val for lang, val in value.items()}
 
 
+# The number of language tags from requests that are kept parsed
+LANGUAGE_TAG_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=LANGUAGE_TAG_CACHE_SIZE)
+def parse_unknown_language_tag(tag: str) -> Language:
+    """
+    Return the language of a tag from a request that isn't translatable. The language is built
+    from the parsed subtags rather than with Language.get(), which keeps every language it parses,
+    so requests with random tags only replace the least recently used ones in this cache.
+    Raises LanguageTagError if the tag isn't well-formed.
+    """
+    subtags = {}
+    for subtag_type, value in langcodes.tag_parser.parse_tag(tag):
+        if subtag_type in {"extlang", "variant", "extension"}:
+            subtags.setdefault(f"{subtag_type}s", []).append(value)
+        elif subtag_type == "grandfathered":
+            subtags["language"] = value
+        elif subtag_type != "language" or value != "und":
+            subtags[subtag_type] = value
+    language = Language(**subtags)
+    # Tags that only differ in case from a translatable language are that language
+    return get_language_registry().by_tag.get(language.to_tag(), language)
+
+
+def get_valid_base_language(language: Language) -> Optional[Language]:
+    """
+    Return the language, script and territory of a language, or None if they aren't valid subtags.
+    langcodes keeps every language it names or matches, so only these are passed to it
+    for languages from requests, which bounds them to the valid subtags.
+    """
+    base = Language(
+        language=language.language, script=language.script, territory=language.territory
+    )
+    if not base.is_valid():
+        return None
+    return base
+
+
 def is_valid_language(language: Union[str, Language]) -> bool:
-    if isinstance(language, Language):
-        language = language
     if isinstance(language, str):
-        try:
-            language = Language.get(language)
-        except langcodes.tag_parser.LanguageTagError:
-            return False
-    return language in get_languages()
+        language = get_safe_language(language)
+    if not isinstance(language, Language):
+        return False
+    return language.to_tag() in get_language_registry().tags
 
 
 def get_current_language() -> Language:
@@ -97,10 +139,114 @@ def validate_language_list(langs) -> List[Language]:
 
 
 def get_languages() -> List[Language]:
+    return list(get_language_registry().languages)
+
+
+def parent_tags(tag: str) -> Tuple[str, ...]:
+    """Return the BCP-47 parents of a language tag, most specific first, eg. zh-Hant-TW -> zh-Hant, zh"""
+    subtags = tag.split("-")
+    return tuple("-".join(subtags[:end]) for end in range(len(subtags) - 1, 0, -1))
+
+
+def derive_fallback_chain(
+    tag: str, tags: Sequence[str], default_tag: Optional[str] = None
+) -> Tuple[str, ...]:
+    """
+    Return the fallback chain of a language: the language, its parents in tags,
+    the default language and its parents in tags, then the other tags in order.
+    """
+    chain = [tag, *(parent for parent in parent_tags(tag) if parent in tags)]
+    if default_tag:
+        chain.append(default_tag)
+        chain.extend(parent for parent in parent_tags(default_tag) if parent in tags)
+    chain.extend(tags)
+    return tuple(dict.fromkeys(chain))
+
+
+@dataclass(frozen=True)
+class LanguageRegistry:
+    """
+    A compiled, read-only view of GARNETT_TRANSLATABLE_LANGUAGES and GARNETT_FALLBACK_CHAINS.
+    Use get_language_registry() to get the current registry rather than building one.
+    """
+
+    languages: Tuple[Language, ...]
+    by_tag: Mapping[str, Language]
+    tags: FrozenSet[str]
+    positions: Mapping[str, int]
+    fallback_chains: Mapping[str, Tuple[str, ...]]
+    expires: Optional[float] = None
+    default_tag: Optional[str] = None
+
+    @classmethod
+    def build(
+        cls,
+        languages: List[Language],
+        expires: Optional[float] = None,
+        default_tag: Optional[str] = None,
+        chains: Optional[Mapping[str, Sequence[str]]] = None,
+    ):
+        languages = tuple(languages)
+        by_tag = {}
+        positions = {}
+        for position, language in enumerate(languages):
+            tag = language.to_tag()
+            by_tag.setdefault(tag, language)
+            positions.setdefault(tag, position)
+
+        tags = tuple(by_tag)
+        fallback_chains = {
+            tag: derive_fallback_chain(tag, tags, default_tag) for tag in tags
+        }
+        for tag, chain in (chains or {}).items():
+            # Configured chains are used as they are, after the language itself
+            fallback_chains[tag] = tuple(dict.fromkeys([tag, *chain]))
+
+        return cls(
+            languages=languages,
+            by_tag=MappingProxyType(by_tag),
+            tags=frozenset(by_tag),
+            positions=MappingProxyType(positions),
+            fallback_chains=MappingProxyType(fallback_chains),
+            expires=expires,
+            default_tag=default_tag,
+        )
+
+    @property
+    def expired(self) -> bool:
+        return self.expires is not None and time.monotonic() >= self.expires
+
+    def __contains__(self, language: Union[str, Language]) -> bool:
+        if isinstance(language, Language):
+            language = language.to_tag()
+        return language in self.tags
+
+    def fallbacks(self, tag: str) -> Tuple[str, ...]:
+        """Return the tags to try in order when showing a field in a language"""
+        try:
+            return self.fallback_chains[tag]
+        except KeyError:
+            # Languages outside the registry aren't compiled, so this stays small
+            return derive_fallback_chain(tag, tuple(self.by_tag), self.default_tag)
+
+
+# Settings that change the output of get_language_registry
+LANGUAGE_SETTINGS = {
+    "GARNETT_TRANSLATABLE_LANGUAGES",
+    "GARNETT_FALLBACK_CHAINS",
+    "GARNETT_DEFAULT_TRANSLATABLE_LANGUAGE",
+    "GARNETT_TRANSLATABLE_LANGUAGES_CACHE_TIMEOUT",
+}
+
+_language_registry: Optional[LanguageRegistry] = None
+
+
+def _build_language_registry() -> LanguageRegistry:
     langs = getattr(
         settings, "GARNETT_TRANSLATABLE_LANGUAGES", [get_default_language()]
     )
-    if callable(langs):
+    dynamic = callable(langs)
+    if dynamic:
         langs = langs()
 
     languages = validate_language_list(langs)
@@ -109,4 +255,67 @@ def get_languages() -> List[Language]:
         raise ImproperlyConfigured(
             "GARNETT_TRANSLATABLE_LANGUAGES must be a list of languages or a callable that returns a list of languages"
         )
-    return languages
+
+    timeout = getattr(settings, "GARNETT_TRANSLATABLE_LANGUAGES_CACHE_TIMEOUT", None)
+    if timeout is None and dynamic:
+        # Callables are read on every use unless a timeout is set
+        timeout = 0
+    expires = None if timeout is None else time.monotonic() + timeout
+    return LanguageRegistry.build(
+        languages,
+        expires=expires,
+        default_tag=get_default_language().to_tag(),
+        chains=_get_fallback_chains_setting(),
+    )
+
+
+def _get_fallback_chains_setting() -> Dict[str, List[str]]:
+    chains = getattr(settings, "GARNETT_FALLBACK_CHAINS", {})
+    if not isinstance(chains, dict) or not all(
+        isinstance(chain, (list, tuple)) for chain in chains.values()
+    ):
+        raise ImproperlyConfigured(
+            "GARNETT_FALLBACK_CHAINS must be a dictionary of language codes to lists of language codes"
+        )
+    return {
+        normalise_language_code(tag): [normalise_language_code(lang) for lang in chain]
+        for tag, chain in chains.items()
+    }
+
+
+def get_language_registry() -> LanguageRegistry:
+    """Return the compiled language registry, building it if needed"""
+    global _language_registry
+    registry = _language_registry
+    if registry is None or registry.expired:
+        registry = _language_registry = _build_language_registry()
+    return registry
+
+
+def clear_language_registry() -> None:
+    """
+    Discard the compiled language registry so it is rebuilt on next use.
+    Call this when the languages returned by a cached callable GARNETT_TRANSLATABLE_LANGUAGES change.
+    """
+    global _language_registry
+    _language_registry = None
+
+
+def get_fallback_languages(language: Union[str, Language] = None) -> Tuple[str, ...]:
+    """
+    Return the language codes to try in order when a translation is missing,
+    starting with the language itself. Uses the current language if none is given.
+    This is the fallback chain compiled from GARNETT_FALLBACK_CHAINS, used by both
+    NextTranslatedStr and TranslatedCoalesce.
+    """
+    if language is None:
+        tag = get_current_language_code()
+    else:
+        tag = normalise_language_code(language)
+    return get_language_registry().fallbacks(tag)
+
+
+@receiver(setting_changed)
+def _reset_language_registry(*, setting, **kwargs):
+    if setting in LANGUAGE_SETTINGS:
+        clear_language_registry()
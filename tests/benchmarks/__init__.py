@@ -0,0 +1,57 @@
+"""
+Benchmarks for garnett.
+
+These are not part of the test suite. Run them from the tests directory, for example:
+
+    python -m benchmarks.translatedstr
+
+Each benchmark creates a throwaway test database using the configured DATABASE_URL.
+"""
+
+import os
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+
+def setup():
+    """Configure django and create a test database for the benchmark"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "library_app.settings")
+    import django
+
+    django.setup()
+
+    from django.db import connection
+
+    connection.creation.create_test_db(verbosity=0)
+
+
+def timed(func: Callable, repeat: int = 5) -> float:
+    """Return the best wall time in seconds from several runs of func"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def allocated(func: Callable) -> Tuple[object, int]:
+    """Return the result of func and the bytes still allocated by it"""
+    tracemalloc.start()
+    try:
+        result = func()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+def report(title: str, rows: list):
+    """Print a simple table of (name, value) rows"""
+    print(title)
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f"  {name.ljust(width)}  {value}")
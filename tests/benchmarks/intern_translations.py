@@ -0,0 +1,64 @@
+"""
+Compare the memory held by a large result set of books that repeat the same
+translations, with and without intern_translations().
+"""
+
+from benchmarks import allocated, report, setup, timed
+
+ROWS = 100_000
+
+
+def main():
+    setup()
+
+    from garnett.context import intern_translations
+    from library_app.models import Book
+
+    formats = [
+        {"en": "Paperback", "de": "Taschenbuch", "fr": "Livre de poche"},
+        {"en": "Hardcover", "de": "Gebundene Ausgabe", "fr": "Relié"},
+        {"en": "Ebook", "de": "E-Book", "fr": "Livre numérique"},
+    ]
+    description = {
+        "en": "Part of the classics collection, printed on recycled paper.",
+        "de": "Teil der Klassiker-Sammlung, gedruckt auf Recyclingpapier.",
+        "fr": "Fait partie de la collection des classiques, imprimé sur papier recyclé.",
+    }
+    Book.objects.bulk_create(
+        (
+            Book(
+                title=formats[i % len(formats)],
+                description=description,
+                other_info={"en": ""},
+                author="Anon",
+                number_of_pages=i,
+            )
+            for i in range(ROWS)
+        ),
+        batch_size=5_000,
+    )
+
+    def load():
+        return list(Book.objects.all())
+
+    def load_interned():
+        with intern_translations():
+            return load()
+
+    results = []
+    for name, func in [("default", load), ("intern_translations()", load_interned)]:
+        seconds = timed(func, repeat=3)
+        _, size = allocated(func)
+        results.append(
+            (
+                name,
+                f"{seconds * 1000:8.1f} ms  {size / 2**20:6.1f} MiB"
+                f"  {size / ROWS:6.0f} bytes/row",
+            )
+        )
+
+    report(f"Loading {ROWS} books with repeated translations", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Compare encoding and decoding translated fields of multilingual rows with each
+installed GARNETT_JSON_CODEC.
+"""
+
+from benchmarks import report, setup, timed
+
+ROWS = 100_000
+
+
+def main():
+    setup()
+
+    from django.db import connection
+    from django.test import override_settings
+
+    from garnett.codec import JSON_CODECS, _is_installed
+    from library_app.models import Book
+
+    field = Book._meta.get_field("title")
+    values = [
+        {
+            "en": f"The book number {i}",
+            "de": f"Das Buch Nummer {i}",
+            "fr": f"Le livre numéro {i}",
+            "tlh": f"paq mI' {i}",
+            "sjn": f"Parma {i}",
+        }
+        for i in range(ROWS)
+    ]
+
+    results = []
+    for name in JSON_CODECS:
+        if not _is_installed(name):
+            results.append((name, "not installed"))
+            continue
+        with override_settings(GARNETT_JSON_CODEC=name):
+            encoded = [field.get_db_prep_value(v, connection) for v in values]
+            encode = lambda: [  # noqa: E731
+                field.get_db_prep_value(v, connection) for v in values
+            ]
+            decode = lambda: [  # noqa: E731
+                field.from_db_value(v, None, connection) for v in encoded
+            ]
+            encode_seconds = timed(encode)
+            decode_seconds = timed(decode)
+        results.append(
+            (
+                name,
+                f"encode {ROWS / encode_seconds:10,.0f} rows/s  "
+                f"decode {ROWS / decode_seconds:10,.0f} rows/s",
+            )
+        )
+
+    report(f"Encoding and decoding {ROWS} translated values", results)
+
+
+if __name__ == "__main__":
+    main()
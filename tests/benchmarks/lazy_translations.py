@@ -0,0 +1,49 @@
+"""
+Compare loading books and only reading a plain field, with and without
+lazy_translations().
+"""
+
+from benchmarks import allocated, report, setup, timed
+
+ROWS = 10_000
+
+
+def main():
+    setup()
+
+    from library_app.models import Book
+
+    Book.objects.bulk_create(
+        Book(
+            title={
+                "en": f"Book {i}",
+                "de": f"Buch {i}",
+                "fr": f"Livre {i}",
+                "tlh": f"paq {i}",
+            },
+            description={"en": f"Description {i}", "de": f"Beschreibung {i}"},
+            other_info={"en": f"Info {i}"},
+            author="Anon",
+            number_of_pages=i,
+        )
+        for i in range(ROWS)
+    )
+
+    results = []
+    for name, queryset in [
+        ("eager", Book.objects.all()),
+        ("lazy_translations()", Book.objects.lazy_translations()),
+    ]:
+        load = lambda: [book.number_of_pages for book in queryset.all()]  # noqa: E731
+        keep = lambda: list(queryset.all())  # noqa: E731
+        seconds = timed(load)
+        _, size = allocated(keep)
+        results.append(
+            (name, f"{seconds * 1000:8.1f} ms  {size / ROWS:6.0f} bytes/row")
+        )
+
+    report(f"Loading {ROWS} books without reading translations", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Measure the time garnett's middleware adds to each request made with the
+Django test client, against the same view without it.
+"""
+
+from benchmarks import report, setup, timed
+
+REQUESTS = 5_000
+
+urlpatterns = []
+
+
+def main():
+    setup()
+
+    from django.http import HttpResponse
+    from django.test import Client, override_settings
+    from django.urls import path
+
+    from garnett.utils import get_current_language_code
+
+    def view(request):
+        return HttpResponse(get_current_language_code())
+
+    urlpatterns.append(path("", view))
+
+    garnett_middleware = [
+        "garnett.middleware.TranslationContextMiddleware",
+        "garnett.middleware.TranslationContextNotFoundMiddleware",
+    ]
+    requests = [
+        ("no language", {}, {}),
+        ("query", {"glang": "de"}, {}),
+        ("header", {}, {"HTTP_X_GARNETT_LANGUAGE_CODE": "fr"}),
+    ]
+
+    results = []
+    baseline = {}
+    for middleware in [None, *garnett_middleware]:
+        name = middleware.rsplit(".", 1)[1] if middleware else "no garnett middleware"
+        with override_settings(
+            ROOT_URLCONF=__name__, MIDDLEWARE=[middleware] if middleware else []
+        ):
+            client = Client()
+            for request_name, data, headers in requests:
+                run = lambda: [  # noqa: E731
+                    client.get("/", data, **headers) for _ in range(REQUESTS)
+                ]
+                per_request = timed(run, repeat=3) / REQUESTS * 1e6
+                if middleware is None:
+                    baseline[request_name] = per_request
+                    value = f"{per_request:7.1f} µs/request"
+                else:
+                    overhead = per_request - baseline[request_name]
+                    value = f"{per_request:7.1f} µs/request  ({overhead:+6.1f} µs)"
+                results.append((f"{name}, {request_name}", value))
+
+    report(f"Making {REQUESTS} requests with the test client", results)
+
+
+if __name__ == "__main__":
+    main()
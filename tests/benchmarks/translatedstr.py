@@ -0,0 +1,80 @@
+"""
+Compare building translated strings with lazy translations against
+building the full `translations` mapping for every string, and time
+building strings that fall back to another language.
+"""
+
+from benchmarks import allocated, report, setup, timed
+
+ROWS = 10_000
+
+
+class EagerMixin:
+    """The previous behaviour, every string parsed its language codes and stored all attributes"""
+
+    def __new__(cls, content, fallback=None):
+        from garnett.utils import codes_to_langs
+
+        instance = super().__new__(cls, content, fallback)
+        instance.translations = codes_to_langs(content)
+        instance.is_fallback = instance.is_fallback
+        instance.fallback_language = instance.fallback_language
+        return instance
+
+
+def main():
+    setup()
+
+    from garnett.context import set_field_language
+    from garnett.translatedstr import (
+        NextTranslatedStr,
+        TranslatedStr,
+        VerboseTranslatedStr,
+    )
+    from library_app.models import Book
+
+    Book.objects.bulk_create(
+        Book(
+            title={
+                "en": f"Book {i}",
+                "de": f"Buch {i}",
+                "fr": f"Livre {i}",
+                "tlh": f"paq {i}",
+            },
+            description={"en": f"Description {i}"},
+            author="Anon",
+            number_of_pages=i,
+        )
+        for i in range(ROWS)
+    )
+    contents = [book.title_tsall for book in Book.objects.all()]
+
+    results = []
+    with set_field_language("de"):
+        for cls in [TranslatedStr, NextTranslatedStr, VerboseTranslatedStr]:
+            eager_cls = type(f"Eager{cls.__name__}", (EagerMixin, cls), {})
+            for name, klass in [(cls.__name__, cls), (eager_cls.__name__, eager_cls)]:
+                build = lambda: [klass(content) for content in contents]  # noqa: E731
+                seconds = timed(build)
+                _, size = allocated(build)
+                results.append(
+                    (
+                        name,
+                        f"{seconds * 1000:8.1f} ms  {size / ROWS:6.0f} bytes/row",
+                    )
+                )
+
+    report(f"Building {ROWS} translated strings", results)
+
+    # Every string falls back, as none of the books are translated into Sindarin
+    results = []
+    with set_field_language("sjn"):
+        for cls in [NextTranslatedStr, VerboseTranslatedStr]:
+            build = lambda: [cls(content) for content in contents]  # noqa: E731
+            results.append((cls.__name__, f"{timed(build) * 1000:8.1f} ms"))
+
+    report(f"Building {ROWS} translated strings with fallbacks", results)
+
+
+if __name__ == "__main__":
+    main()
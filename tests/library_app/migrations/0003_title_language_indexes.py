@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:00
+
+import django.db.models.fields.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_app', '0002_make_translatable'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('en', 'title'), name='library_title_en_b606a2'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('en-AU', 'title'), name='library_title_en_au_f3eb66'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('de', 'title'), name='library_title_de_2707cf'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('fr', 'title'), name='library_title_fr_62e045'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('sjn', 'title'), name='library_title_sjn_a9789b'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('tlh', 'title'), name='library_title_tlh_138e9e'),
+        ),
+    ]
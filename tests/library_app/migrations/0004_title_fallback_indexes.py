@@ -0,0 +1,68 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:08
+
+import garnett.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library_app", "0003_title_language_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                garnett.expressions.TranslatedCoalesce(
+                    "title", ("en", "en-AU", "de", "fr", "sjn", "tlh")
+                ),
+                name="library_title_en_13bb89",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                garnett.expressions.TranslatedCoalesce(
+                    "title", ("en-AU", "en", "de", "fr", "sjn", "tlh")
+                ),
+                name="library_title_en_au_b52bd1",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                garnett.expressions.TranslatedCoalesce(
+                    "title", ("de", "en", "en-AU", "fr", "sjn", "tlh")
+                ),
+                name="library_title_de_5c0089",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                garnett.expressions.TranslatedCoalesce(
+                    "title", ("fr", "en", "en-AU", "de", "sjn", "tlh")
+                ),
+                name="library_title_fr_6824bf",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                garnett.expressions.TranslatedCoalesce(
+                    "title", ("sjn", "en", "en-AU", "de", "fr", "tlh")
+                ),
+                name="library_title_sjn_167d6e",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                garnett.expressions.TranslatedCoalesce(
+                    "title", ("tlh", "en", "en-AU", "de", "fr", "sjn")
+                ),
+                name="library_title_tlh_872afa",
+            ),
+        ),
+    ]
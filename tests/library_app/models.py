@@ -3,6 +3,7 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from garnett import fields
+from garnett.mixins import TranslatedModelMixin
 from garnett.translatedstr import TranslatedStr
 from garnett.utils import get_languages, get_current_language
 from library_app.managers import BookQuerySet
@@ -86,7 +87,7 @@ class TitleTranslatedStr(TranslatedStr):
             """
 
 
-class Book(models.Model):
+class Book(TranslatedModelMixin, models.Model):
     objects = BookQuerySet.as_manager()
 
     number_of_pages = models.PositiveIntegerField()
@@ -94,6 +95,8 @@ class Book(models.Model):
     title = fields.Translated(
         models.CharField(max_length=250, validators=[validate_length]),
         fallback=TitleTranslatedStr,
+        indexed_languages=True,
+        index_fallbacks=True,
         help_text=_("The name for a book. (Multilingal field)"),
     )
 
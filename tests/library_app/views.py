@@ -1,6 +1,6 @@
 from django.views.generic import DetailView, ListView, UpdateView
 from reversion_compare.views import HistoryCompareDetailView
-from garnett.utils import get_current_language_code
+from garnett.expressions import TranslatedCoalesce
 
 from library_app.models import Book
 
@@ -14,8 +14,8 @@ class BookListView(ListView):
     model = Book
 
     def get_ordering(self):
-        code = get_current_language_code()
-        return f"title__{code}"
+        # Order by the title users see, including fallbacks, so the fallback index can be used
+        return [TranslatedCoalesce("title").asc()]
 
 
 class BookUpdateView(UpdateView):
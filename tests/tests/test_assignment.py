@@ -1,8 +1,11 @@
 from django.core.exceptions import ValidationError
+from django.db import models
 from django.test import TestCase
+from django.test.utils import isolate_apps
 
 from garnett.context import set_field_language
 import garnett.exceptions
+from garnett.fields import TranslatedField
 from library_app.models import Book
 
 book_data = dict(
@@ -107,6 +110,21 @@ class TestFieldAssignment(TestCase):
             self.book.clean_fields()
             self.assertEqual(err.exception, 'Invalid value for language "en"')
 
+    @isolate_apps("library_app")
+    def test_dict_default_not_shared(self):
+        class Magazine(models.Model):
+            title = TranslatedField(models.CharField(max_length=250), default={})
+
+            class Meta:
+                app_label = "library_app"
+
+        first, second = Magazine(), Magazine()
+        with set_field_language("en"):
+            first.title = "First"
+        self.assertEqual(first.title_tsall, {"en": "First"})
+        self.assertEqual(second.title_tsall, {})
+        self.assertEqual(Magazine._meta.get_field("title").default, {})
+
 
 class TestQuerysetAssignment(TestCase):
     def test_qs_create_from_dict(self):
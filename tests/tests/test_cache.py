@@ -0,0 +1,115 @@
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import Client, TestCase, override_settings
+from django.urls import path
+
+from garnett.context import set_field_language
+from garnett.decorators import cache_page, vary_on_language
+from garnett.utils import get_current_language_code
+
+views_called = []
+
+
+def language_view(request):
+    views_called.append(request.path)
+    return HttpResponse(get_current_language_code())
+
+
+urlpatterns = [
+    path("cached/", cache_page(60)(language_view)),
+    path("page/", language_view),
+    path("vary/", vary_on_language(language_view)),
+]
+
+
+class LanguageCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        views_called.clear()
+        self.client = Client()
+
+    def assertCachedLanguages(self, url):
+        for _ in range(2):
+            self.assertEqual(self.client.get(url, {"glang": "de"}).content, b"de")
+            response = self.client.get(url, HTTP_X_GARNETT_LANGUAGE_CODE="fr")
+            self.assertEqual(response.content, b"fr")
+            self.assertEqual(self.client.get(url).content, b"en")
+        self.assertEqual(len(views_called), 3)
+        self.assertIn("X-Garnett-Language-Code", response["Vary"])
+        self.assertIn("Cookie", response["Vary"])
+
+        # Other cookies don't change the language, so visitors share the cached page
+        for visitor in ["one", "two"]:
+            self.client.cookies["csrftoken"] = visitor
+            response = self.client.get(url, {"glang": "de"})
+            self.assertEqual(response.content, b"de")
+            self.assertIn("Cookie", response["Vary"])
+        self.client.cookies["GARNETT_LANGUAGE_CODE"] = "fr"
+        self.assertEqual(self.client.get(url).content, b"fr")
+        self.assertEqual(len(views_called), 3)
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    MIDDLEWARE=["garnett.middleware.TranslationContextMiddleware"],
+)
+class TestCachePage(LanguageCacheTestCase):
+    def test_cache_page(self):
+        self.assertCachedLanguages("/cached/")
+
+    def test_blank_fallback_cached_separately(self):
+        with override_settings(GARNETT_ALLOW_BLANK_FALLBACK_OVERRIDE=True):
+            self.client.get("/cached/", {"glang": "de", "gblank": "1"})
+            self.client.get("/cached/", {"glang": "de", "gblank": "1"})
+        self.client.get("/cached/", {"glang": "de", "gblank": "1"})
+        self.assertEqual(len(views_called), 2)
+
+    @override_settings(GARNETT_REQUEST_LANGUAGE_SELECTORS=["garnett.selectors.query"])
+    def test_vary_on_language(self):
+        response = self.client.get("/vary/")
+        self.assertFalse(response.has_header("Vary"))
+        with override_settings(
+            GARNETT_REQUEST_LANGUAGE_SELECTORS=[
+                "garnett.selectors.accept_language",
+                "garnett.selectors.header",
+            ]
+        ):
+            response = self.client.get("/vary/")
+        self.assertEqual(response["Vary"], "Accept-Language, X-Garnett-Language-Code")
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    MIDDLEWARE=[
+        "garnett.middleware.TranslationUpdateCacheMiddleware",
+        "garnett.middleware.TranslationContextMiddleware",
+        "garnett.middleware.TranslationFetchFromCacheMiddleware",
+    ],
+)
+class TestCacheMiddleware(LanguageCacheTestCase):
+    def test_cache_middleware(self):
+        self.assertCachedLanguages("/page/")
+
+
+class TestCacheTemplateTag(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def render(self, value, language):
+        template = Template(
+            "{% load garnett %}"
+            "{% garnett_cache 60 fragment %}{{ value }}{% endgarnett_cache %}"
+        )
+        with set_field_language(language):
+            return template.render(Context({"value": value}))
+
+    def test_fragment_cached_for_each_language(self):
+        self.assertEqual(self.render("Hello", "en"), "Hello")
+        self.assertEqual(self.render("Changed", "en"), "Hello")
+        self.assertEqual(self.render("Hallo", "de"), "Hallo")
+        self.assertEqual(self.render("Changed", "de"), "Hallo")
+
+    def test_requires_arguments(self):
+        with self.assertRaises(TemplateSyntaxError):
+            Template("{% load garnett %}{% garnett_cache 60 %}{% endgarnett_cache %}")
@@ -0,0 +1,125 @@
+from dataclasses import replace
+import datetime
+import decimal
+import io
+import json
+from unittest import skipUnless
+
+from django.core import serializers
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import TestCase, override_settings
+from mock import Mock, patch
+
+from garnett import migrate
+from garnett.codec import _is_installed, get_json_codec
+from library_app.models import Book
+
+orjson_installed = _is_installed("orjson")
+
+
+class TestJSONCodec(TestCase):
+    def test_default_codec(self):
+        codec = get_json_codec()
+        self.assertEqual(codec.name, "json")
+        self.assertIs(codec, get_json_codec())
+
+    @skipUnless(orjson_installed, "orjson is not installed")
+    def test_auto_codec(self):
+        with override_settings(GARNETT_JSON_CODEC="auto"):
+            self.assertEqual(get_json_codec().name, "orjson")
+        self.assertEqual(get_json_codec().name, "json")
+
+    def test_codec_not_installed(self):
+        with patch("garnett.codec.importlib.util.find_spec", return_value=None):
+            with override_settings(GARNETT_JSON_CODEC="msgspec"):
+                with self.assertLogs("garnett.codec", "WARNING"):
+                    self.assertEqual(get_json_codec().name, "json")
+            with override_settings(GARNETT_JSON_CODEC="auto"):
+                self.assertEqual(get_json_codec().name, "json")
+
+    def test_invalid_codec(self):
+        with override_settings(GARNETT_JSON_CODEC="yaml"):
+            with self.assertRaises(ImproperlyConfigured):
+                get_json_codec()
+
+    def test_dumps_returns_str(self):
+        for name in ["json", "orjson", "msgspec"]:
+            if not _is_installed(name):
+                continue
+            with self.subTest(name), override_settings(GARNETT_JSON_CODEC=name):
+                codec = get_json_codec()
+                value = codec.dumps({"de": "Straße"})
+                self.assertIsInstance(value, str)
+                self.assertEqual(codec.loads(value), {"de": "Straße"})
+
+    def test_dumps_encodes_like_django(self):
+        value = {
+            "datetime": datetime.datetime(
+                2021, 3, 4, 5, 6, 7, 891011, tzinfo=datetime.timezone.utc
+            ),
+            "date": datetime.date(2021, 3, 4),
+            "time": datetime.time(5, 6, 7, 891011),
+            "number": decimal.Decimal("1.50"),
+        }
+        expected = json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+        for name in ["json", "orjson", "msgspec"]:
+            if not _is_installed(name):
+                continue
+            with self.subTest(name), override_settings(GARNETT_JSON_CODEC=name):
+                encoded = get_json_codec().dumps(value, DjangoJSONEncoder().default)
+                self.assertEqual(json.loads(encoded), expected)
+
+
+@skipUnless(orjson_installed, "orjson is not installed")
+@override_settings(GARNETT_JSON_CODEC="orjson")
+class TestFastCodec(TestCase):
+    def setUp(self):
+        self.title = {"en": "The Hobbit", "de": "Der Hobbit", "fr": "Le Hobbit"}
+        self.book = Book.objects.create(
+            title=self.title,
+            author="J. R. R. Tolkien",
+            description={"en": "There and back again"},
+            category={"dewey": 823},
+            number_of_pages=310,
+        )
+
+    def test_field_round_trip(self):
+        book = Book.objects.get(pk=self.book.pk)
+        self.assertEqual(book.title_tsall, self.title)
+        self.assertEqual(Book.objects.get(title__de="Der Hobbit"), book)
+        self.assertEqual(
+            list(Book.objects.values_list("title__fr", flat=True)), ["Le Hobbit"]
+        )
+
+    def test_field_decode(self):
+        field = Book._meta.get_field("title")
+        codec = get_json_codec()
+        loads = Mock(side_effect=codec.loads)
+        with patch("garnett.codec._json_codec", replace(codec, loads=loads)):
+            Book.objects.get(pk=self.book.pk)
+        self.assertTrue(loads.called)
+        self.assertEqual(
+            field.from_db_value('{"en": "Title"}', None, None), {"en": "Title"}
+        )
+        self.assertEqual(field.from_db_value("not json", None, None), "not json")
+        self.assertIsNone(field.from_db_value(None, None, None))
+
+    def test_serializer_round_trip(self):
+        data = serializers.serialize("json", Book.objects.all())
+        with override_settings(GARNETT_JSON_CODEC="json"):
+            self.assertEqual(
+                json.loads(data),
+                json.loads(serializers.serialize("json", Book.objects.all())),
+            )
+
+        self.book.delete()
+        for obj in serializers.deserialize("json", io.StringIO(data)):
+            obj.save()
+        self.assertEqual(Book.objects.get().title_tsall, self.title)
+
+    def test_migration_helpers(self):
+        value = migrate.update_safe_encode_content_forwards("en", "It's 'quoted'")
+        self.assertEqual(
+            migrate.update_safe_encode_content_backwards("en", value), "It's 'quoted'"
+        )
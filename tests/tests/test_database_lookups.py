@@ -1,7 +1,8 @@
-from django.db import connection
+from django.db import NotSupportedError, connection
 from django.db.models.functions import Lower
-from django.test import TestCase
-from garnett.expressions import L
+from django.test import TestCase, override_settings
+from garnett.expressions import L, TranslatedCoalesce
+from garnett.indexes import any_language_indexes, language_index_name
 from garnett.patch import apply_patches, revert_patches
 
 from unittest import skipIf, skipUnless
@@ -452,6 +453,212 @@ class TestExpressions(TestCase):
             self.assertEqual(qs[0].foo, "testing for dummies")
 
 
+class TestFallbackExpressions(TestCase):
+    """Test queries using the fallback expression"""
+
+    def setUp(self):
+        titles = [
+            {"en": "Bravo", "de": "Delta"},
+            {"en": "Charlie"},
+            {"de": "Alpha"},
+            {"fr": "Echo"},
+        ]
+        for title in titles:
+            Book.objects.create(title=title, description={}, number_of_pages=1)
+
+    def test_order_by_fallbacks(self):
+        with set_field_language("de"):
+            qs = Book.objects.order_by(TranslatedCoalesce("title"))
+            self.assertEqual(
+                [str(book.title) for book in qs], ["Alpha", "Charlie", "Delta", "Echo"]
+            )
+        with set_field_language("en"):
+            qs = Book.objects.order_by(TranslatedCoalesce("title").desc())
+            self.assertEqual(
+                [str(book.title) for book in qs], ["Echo", "Charlie", "Bravo", "Alpha"]
+            )
+
+    def test_annotate_and_values(self):
+        with set_field_language("fr"):
+            qs = Book.objects.annotate(shown=TranslatedCoalesce("title"))
+            self.assertEqual(
+                sorted(qs.values_list("shown", flat=True)),
+                ["Alpha", "Bravo", "Charlie", "Echo"],
+            )
+            # Matches the text shown by the field's fallback
+            for book in qs:
+                self.assertEqual(book.shown, str(book.title))
+
+    def test_explicit_languages(self):
+        qs = Book.objects.annotate(
+            shown=TranslatedCoalesce("title", ["fr", "de"])
+        ).order_by("shown")
+        self.assertEqual(
+            list(qs.exclude(shown=None).values_list("shown", flat=True)),
+            ["Alpha", "Delta", "Echo"],
+        )
+        qs = Book.objects.annotate(shown=TranslatedCoalesce("title", ["fr"]))
+        self.assertEqual(
+            sorted(filter(None, qs.values_list("shown", flat=True))), ["Echo"]
+        )
+
+    def titles(self, **lookup):
+        return sorted(str(book.title) for book in Book.objects.filter(**lookup))
+
+    def test_fallback_lookups(self):
+        with set_field_language("de"):
+            self.assertEqual(self.titles(title__fb_exact="Charlie"), ["Charlie"])
+            self.assertEqual(self.titles(title__fb_exact="Bravo"), [])
+            self.assertEqual(self.titles(title__fb_iexact="echo"), ["Echo"])
+            self.assertEqual(self.titles(title__fb_contains="lt"), ["Delta"])
+            self.assertEqual(
+                self.titles(title__fb_icontains="H"), ["Alpha", "Charlie", "Echo"]
+            )
+            self.assertEqual(self.titles(title__fb_startswith="Ch"), ["Charlie"])
+            self.assertEqual(self.titles(title__fb_istartswith="e"), ["Echo"])
+
+        with set_field_language("en"):
+            self.assertEqual(self.titles(title__fb_exact="Bravo"), ["Bravo"])
+            self.assertEqual(
+                self.titles(title__fb_icontains="a"), ["Alpha", "Bravo", "Charlie"]
+            )
+            # Lookups without fallbacks only match the current language
+            self.assertEqual(self.titles(title__icontains="a"), ["Bravo", "Charlie"])
+
+
+class TestAnyLanguageLookups(TestCase):
+    """Test lookups on any language of a field"""
+
+    def setUp(self):
+        titles = [
+            {"en": "Bravo", "de": "Delta"},
+            {"en": "Charlie"},
+            {"fr": 'Le "Echo"'},
+            {"de": "50% Alpha"},
+        ]
+        for title in titles:
+            Book.objects.create(title=title, description={}, number_of_pages=1)
+
+    def titles(self, **lookup):
+        return sorted(
+            book.title_tsall[next(iter(book.title_tsall))]
+            for book in Book.objects.filter(**lookup)
+        )
+
+    def test_any_language_lookups(self):
+        self.assertEqual(self.titles(title__any_lang="Delta"), ["Bravo"])
+        self.assertEqual(self.titles(title__any_lang__exact="Charlie"), ["Charlie"])
+        self.assertEqual(self.titles(title__any_lang__iexact="delta"), ["Bravo"])
+        self.assertEqual(
+            self.titles(title__any_lang__contains="ha"), ["50% Alpha", "Charlie"]
+        )
+        self.assertEqual(
+            self.titles(title__any_lang__icontains="A"),
+            ["50% Alpha", "Bravo", "Charlie"],
+        )
+        self.assertEqual(self.titles(title__any_lang__startswith="De"), ["Bravo"])
+        self.assertEqual(self.titles(title__any_lang__istartswith="le"), ['Le "Echo"'])
+        self.assertEqual(
+            self.titles(title__any_lang__regex=r"^[BC]"), ["Bravo", "Charlie"]
+        )
+        self.assertEqual(
+            self.titles(title__any_lang__iregex=r"o.?$"), ["Bravo", 'Le "Echo"']
+        )
+
+    def test_special_characters(self):
+        self.assertEqual(self.titles(title__any_lang__contains='"Echo"'), ['Le "Echo"'])
+        self.assertEqual(self.titles(title__any_lang__contains="50%"), ["50% Alpha"])
+        self.assertEqual(self.titles(title__any_lang__contains="en"), [])
+
+    def test_any_language_combined(self):
+        qs = Book.objects.filter(title__any_lang__icontains="a").exclude(
+            title__any_lang__icontains="e"
+        )
+        self.assertEqual([book.title_tsall for book in qs], [{"de": "50% Alpha"}])
+
+    def test_not_an_expression(self):
+        with self.assertRaises(NotSupportedError):
+            list(Book.objects.values_list("title__any_lang"))
+
+
+@skipUnless(
+    connection.vendor == "postgresql", "Containment lookups are only used on Postgres"
+)
+class TestContainmentLookups(TestCase):
+    """Test exact lookups give the same results using containment"""
+
+    def setUp(self):
+        Book.objects.create(
+            title={"en": "A good book", "de": 'Ein "gut" buch'},
+            description={},
+            number_of_pages=1,
+        )
+
+    @override_settings(GARNETT_POSTGRES_CONTAINMENT_LOOKUPS=True)
+    def test_exact(self):
+        books = Book.objects.all()
+        with set_field_language("de"):
+            self.assertTrue(books.filter(title='Ein "gut" buch').exists())
+            self.assertTrue(books.filter(title__en="A good book").exists())
+            self.assertTrue(books.filter(title__de__exact='Ein "gut" buch').exists())
+            self.assertFalse(books.filter(title="A good book").exists())
+            self.assertFalse(books.filter(title__fr="A good book").exists())
+            self.assertIn("@>", str(books.filter(title__en="A good book").query))
+
+
+@skipUnless(connection.vendor == "postgresql", "Index usage is checked on Postgres")
+class TestIndexedLookups(TestCase):
+    """Test lookups compile to the expressions their indexes are built on"""
+
+    def setUp(self):
+        for i in range(20):
+            Book.objects.create(
+                title={"en": f"Book {i}", "de": f"Buch {i}"},
+                description={},
+                number_of_pages=i,
+            )
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, index_type, language="de"):
+        name = language_index_name(Book._meta.db_table, "title", language, index_type)
+        self.assertIn(name, queryset.explain())
+
+    def test_language_lookups(self):
+        books = Book.objects.all()
+        with set_field_language("de"):
+            self.assertUsesIndex(books.filter(title="Buch 1"), "btree")
+            self.assertUsesIndex(books.filter(title__de="Buch 1"), "btree")
+            self.assertUsesIndex(books.filter(title__en="Book 1"), "btree", "en")
+            self.assertUsesIndex(books.filter(title__gt="Buch 5"), "btree")
+            self.assertUsesIndex(books.filter(title__lte="Buch 5"), "btree")
+            self.assertUsesIndex(books.filter(title__en__gte="Book 5"), "btree", "en")
+            self.assertUsesIndex(books.filter(title__de__lt="Buch 5"), "btree")
+
+    def test_fallback_lookups(self):
+        books = Book.objects.all()
+        with set_field_language("de"):
+            self.assertUsesIndex(
+                books.filter(title__fb_exact="Buch 1"), "btree_fallback"
+            )
+            self.assertUsesIndex(
+                books.order_by(TranslatedCoalesce("title"))[:5], "btree_fallback"
+            )
+
+    @override_settings(GARNETT_POSTGRES_CONTAINMENT_LOOKUPS=True)
+    def test_containment_lookups(self):
+        field = Book._meta.get_field("title")
+        (index,) = any_language_indexes(Book, field, ["jsonb_path_ops"])
+        with connection.schema_editor() as editor:
+            editor.add_index(Book, index)
+
+        books = Book.objects.all()
+        with set_field_language("de"):
+            self.assertIn(index.name, books.filter(title="Buch 1").explain())
+            self.assertIn(index.name, books.filter(title__en="Book 1").explain())
+            self.assertEqual(books.filter(title="Buch 1").count(), 1)
+
+
 @skipIf(connection.vendor == "sqlite", "JSONField contains isn't avaliable on sqlite")
 class TestJSONFieldLookups(TestCase):
     """Tests to ensure we are not messing with json field functionality"""
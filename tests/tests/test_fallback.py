@@ -1,7 +1,17 @@
 from django.test import TestCase, override_settings
+from django.utils import translation
+from langcodes import Language
+from mock import patch
 
 from library_app.models import Book
-from garnett.translatedstr import VerboseTranslatedStr, NextTranslatedStr
+from garnett.translatedstr import (
+    TranslatedStr,
+    VerboseTranslatedStr,
+    NextTranslatedStr,
+    get_missing_translation_message,
+)
+from garnett.expressions import TranslatedCoalesce
+from garnett.utils import get_current_language_code, get_language_registry
 from garnett.context import set_field_language
 
 
@@ -49,3 +59,86 @@ class TestFallbacks(TestCase):
         self.assertEqual(
             result, "No translation of this field available in English [English]."
         )
+
+    def test_translations_are_lazy(self):
+        with set_field_language("en"):
+            result = NextTranslatedStr(self.book.title_tsall)
+        self.assertNotIn("translations", vars(result))
+        self.assertFalse(result.is_fallback)
+        self.assertIsNone(result.fallback_language)
+        self.assertEqual(
+            {lang.to_tag(): text for lang, text in result.translations.items()},
+            {"en": "The Book", "de": "Das Buch", "fr": "Le livre"},
+        )
+        self.assertIn("translations", vars(result))
+
+    def test_default_fallback_message_is_cached(self):
+        get_missing_translation_message.cache_clear()
+        with patch.object(
+            Language, "display_name", autospec=True, return_value="Deutsch"
+        ) as display_name:
+            with set_field_language("de"):
+                for _ in range(3):
+                    result = VerboseTranslatedStr({"en": "The Book"})
+                    self.assertEqual(result.fallback_language.to_tag(), "de")
+            self.assertEqual(display_name.call_count, 2)
+
+            # The message is translated into the UI language, so it is cached for each
+            with set_field_language("de"), translation.override("de"):
+                VerboseTranslatedStr({"en": "The Book"})
+            self.assertEqual(display_name.call_count, 4)
+
+    def test_next_language_candidates_are_cached(self):
+        registry = get_language_registry()
+        with set_field_language("fr"):
+            result = NextTranslatedStr({"de": "Das Buch"})
+            self.assertEqual(result.fallback_language.to_tag(), "de")
+            fallbacks = registry.fallbacks("fr")
+            self.assertEqual(fallbacks, ("fr", "en", "de"))
+            self.assertIs(registry.fallbacks("fr"), fallbacks)
+            NextTranslatedStr({"de": "Das Buch"})
+            self.assertIs(registry.fallbacks("fr"), fallbacks)
+        # Languages outside the registry aren't cached
+        self.assertEqual(registry.fallbacks("es"), ("es", "en", "de", "fr"))
+        self.assertNotIn("es", registry.fallback_chains)
+
+    @override_settings(
+        GARNETT_TRANSLATABLE_LANGUAGES=["en", "de", "fr", "fr-CA"],
+        GARNETT_FALLBACK_CHAINS={"de-at": ["de"]},
+    )
+    def test_next_language_uses_fallback_chains(self):
+        content = {"en": "The Book", "fr": "Le livre", "de": "Das Buch"}
+        with set_field_language("fr-CA"):
+            result = NextTranslatedStr(content)
+            self.assertEqual(result, "Le livre")
+            self.assertEqual(
+                TranslatedCoalesce("title").languages, ("fr-CA", "fr", "en", "de")
+            )
+        with set_field_language("de-AT"):
+            self.assertEqual(NextTranslatedStr(content), "Das Buch")
+            self.assertEqual(NextTranslatedStr({"en": "The Book"}), "")
+            self.assertEqual(TranslatedCoalesce("title").languages, ("de-AT", "de"))
+
+    def test_fallback_for_language(self):
+        with set_field_language("en"):
+            result = VerboseTranslatedStr.for_language({"en": "Hello"}, "fr")
+            self.assertEqual(result.fallback_language.to_tag(), "fr")
+            self.assertEqual(
+                result, "No translation of this field available in français [French]."
+            )
+            result = NextTranslatedStr.for_language(
+                {"en": "Hello", "de": "Hallo"}, "de"
+            )
+            self.assertFalse(result.is_fallback)
+            result = NextTranslatedStr.for_language({"de": "Hallo"}, "fr")
+            self.assertEqual(result.fallback_language.to_tag(), "de")
+
+            def fallback(content):
+                return None, get_current_language_code()
+
+            result = TranslatedStr.for_language({}, "de", fallback=fallback)
+            self.assertEqual(result, "de")
+            self.assertEqual(get_current_language_code(), "en")
+
+            result = VerboseTranslatedStr.for_language({}, "de")
+            self.assertEqual(result.fallback_language.to_tag(), "de")
@@ -0,0 +1,141 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, models
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.graph import MigrationGraph
+from django.db.migrations.questioner import MigrationQuestioner
+from django.db.migrations.state import ModelState, ProjectState
+from django.test import TestCase, override_settings
+from django.test.utils import isolate_apps
+from mock import patch
+
+from garnett.context import set_field_language
+from garnett.expressions import TranslatedCoalesce
+from garnett.fields import TranslatedField
+from library_app.models import Book
+
+
+def project_state(*models):
+    state = ProjectState()
+    for model in models:
+        state.add_model(ModelState.from_model(model))
+    return state
+
+
+def magazine_model(**kwargs):
+    with isolate_apps("library_app"):
+
+        class Magazine(models.Model):
+            title = TranslatedField(models.CharField(max_length=250), **kwargs)
+
+            class Meta:
+                app_label = "library_app"
+
+    return Magazine
+
+
+def index_operations(before, after):
+    questioner = MigrationQuestioner(specified_apps={"library_app"})
+    changes = MigrationAutodetector(before, after, questioner).changes(
+        graph=MigrationGraph()
+    )
+    return [
+        (type(operation).__name__, getattr(operation, "index", operation).name)
+        for migration in changes.get("library_app", [])
+        for operation in migration.operations
+    ]
+
+
+class TestLanguageIndexes(TestCase):
+    def test_all_languages_indexed(self):
+        title = Book._meta.get_field("title")
+        self.assertEqual(
+            title.get_indexed_languages(), ["en", "en-AU", "de", "fr", "sjn", "tlh"]
+        )
+        names = {index.name for index in Book._meta.indexes}
+        for index in title.get_language_indexes(Book):
+            self.assertIn(index.name, names)
+
+    @isolate_apps("library_app")
+    def test_index_types(self):
+        class Magazine(models.Model):
+            title = TranslatedField(
+                models.CharField(max_length=250),
+                indexed_languages=["en", "de-at"],
+                index_types=["btree", "gin_trgm"],
+            )
+
+            class Meta:
+                app_label = "library_app"
+
+        indexes = Magazine._meta.indexes
+        self.assertEqual(len(indexes), 4)
+        self.assertEqual(len({index.name for index in indexes}), 4)
+        self.assertEqual(
+            [type(index) for index in indexes],
+            [models.Index, GinIndex, models.Index, GinIndex],
+        )
+        self.assertEqual(indexes[2].expressions[0].deconstruct()[1], ("de-AT", "title"))
+        for index in indexes:
+            self.assertLessEqual(len(index.name), index.max_name_length)
+
+    def test_fallback_indexes(self):
+        Magazine = magazine_model(indexed_languages=["de"], index_fallbacks=True)
+        language, fallback = Magazine._meta.indexes
+        self.assertNotEqual(language.name, fallback.name)
+        (expression,) = fallback.expressions
+        self.assertIsInstance(expression, TranslatedCoalesce)
+        self.assertEqual(
+            expression.languages, ("de", "en", "en-AU", "fr", "sjn", "tlh")
+        )
+        # The index matches ordering by the fallbacks of the current language
+        with set_field_language("de"):
+            self.assertEqual(
+                TranslatedCoalesce("title").languages, expression.languages
+            )
+
+    def test_any_language_indexes(self):
+        Magazine = magazine_model(any_language_index_types=["gin_trgm_upper"])
+        (index,) = Magazine._meta.indexes
+        self.assertIsInstance(index, GinIndex)
+        self.assertIn("_any_", index.name)
+
+    def test_invalid_index_type(self):
+        with self.assertRaises(ValueError):
+            TranslatedField(models.CharField(), index_types=["hash_browns"])
+        with self.assertRaises(ValueError):
+            TranslatedField(models.CharField(), any_language_index_types=["hash"])
+
+    @override_settings(GARNETT_TRANSLATABLE_LANGUAGES=lambda: ["en"])
+    def test_all_languages_requires_list(self):
+        field = TranslatedField(models.CharField(), indexed_languages=True)
+        with self.assertRaises(ImproperlyConfigured):
+            field.get_indexed_languages()
+
+    def test_unsupported_database(self):
+        with patch.object(connection, "vendor", "mysql"):
+            with self.assertRaisesMessage(ImproperlyConfigured, "mysql"):
+                magazine_model(indexed_languages=["en"])
+            # Models without language indexes don't need a supported database
+            self.assertEqual(magazine_model()._meta.indexes, [])
+
+    def test_autodetector(self):
+        before = project_state(magazine_model())
+        after = project_state(magazine_model(indexed_languages=["en", "fr"]))
+        first, second = after.models["library_app", "magazine"].options["indexes"]
+        self.assertEqual(
+            index_operations(before, after),
+            [("AddIndex", first.name), ("AddIndex", second.name)],
+        )
+
+        before = after
+        after = project_state(magazine_model(indexed_languages=["en"]))
+        self.assertEqual(
+            index_operations(before, after), [("RemoveIndex", second.name)]
+        )
+
+        # Rendering the migration state doesn't duplicate the indexes
+        historical = after.apps.get_model("library_app", "magazine")
+        self.assertEqual(
+            [index.name for index in historical._meta.indexes], [first.name]
+        )
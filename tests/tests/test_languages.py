@@ -0,0 +1,139 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from mock import Mock, patch
+
+from garnett.utils import (
+    clear_language_registry,
+    get_language_registry,
+    get_fallback_languages,
+    get_languages,
+    is_valid_language,
+    parent_tags,
+)
+
+
+class TestLanguageRegistry(TestCase):
+    def setUp(self):
+        clear_language_registry()
+
+    def tearDown(self):
+        clear_language_registry()
+
+    @override_settings(GARNETT_TRANSLATABLE_LANGUAGES=["en", "de", "fr", "de"])
+    def test_registry_contents(self):
+        registry = get_language_registry()
+        self.assertEqual(
+            [lang.to_tag() for lang in registry.languages], ["en", "de", "fr", "de"]
+        )
+        self.assertEqual(registry.tags, frozenset(["en", "de", "fr"]))
+        self.assertEqual(registry.by_tag["de"].to_tag(), "de")
+        self.assertEqual(dict(registry.positions), {"en": 0, "de": 1, "fr": 2})
+        self.assertIn("fr", registry)
+        self.assertNotIn("es", registry)
+
+        with self.assertRaises(TypeError):
+            registry.by_tag["es"] = None
+
+    def test_registry_is_cached(self):
+        self.assertIs(get_language_registry(), get_language_registry())
+
+    def test_get_languages_returns_copy(self):
+        languages = get_languages()
+        languages.clear()
+        self.assertTrue(get_languages())
+
+    def test_registry_rebuilt_on_setting_changed(self):
+        with override_settings(GARNETT_TRANSLATABLE_LANGUAGES=["en", "de"]):
+            self.assertTrue(is_valid_language("de"))
+            self.assertFalse(is_valid_language("fr"))
+        with override_settings(GARNETT_TRANSLATABLE_LANGUAGES=["en", "fr"]):
+            self.assertFalse(is_valid_language("de"))
+            self.assertTrue(is_valid_language("fr"))
+
+    def test_invalid_languages(self):
+        self.assertFalse(is_valid_language("not a language"))
+        self.assertFalse(is_valid_language(None))
+        with override_settings(GARNETT_TRANSLATABLE_LANGUAGES="en"):
+            with self.assertRaises(ImproperlyConfigured):
+                get_language_registry()
+
+    def test_callable_languages_are_not_cached(self):
+        languages = Mock(return_value=["en", "de"])
+        with override_settings(GARNETT_TRANSLATABLE_LANGUAGES=languages):
+            self.assertTrue(is_valid_language("de"))
+            self.assertTrue(is_valid_language("en"))
+            self.assertEqual(languages.call_count, 2)
+
+            languages.return_value = ["en"]
+            self.assertFalse(is_valid_language("de"))
+
+    def test_callable_languages_are_cached_until_cleared(self):
+        languages = Mock(return_value=["en", "de"])
+        with override_settings(
+            GARNETT_TRANSLATABLE_LANGUAGES=languages,
+            GARNETT_TRANSLATABLE_LANGUAGES_CACHE_TIMEOUT=60,
+        ):
+            self.assertTrue(is_valid_language("de"))
+            self.assertTrue(is_valid_language("en"))
+            self.assertEqual(languages.call_count, 1)
+
+            languages.return_value = ["en"]
+            self.assertTrue(is_valid_language("de"))
+
+            clear_language_registry()
+            self.assertFalse(is_valid_language("de"))
+            self.assertEqual(languages.call_count, 2)
+
+    def test_callable_languages_timeout(self):
+        languages = Mock(return_value=["en", "de"])
+        with override_settings(
+            GARNETT_TRANSLATABLE_LANGUAGES=languages,
+            GARNETT_TRANSLATABLE_LANGUAGES_CACHE_TIMEOUT=60,
+        ):
+            with patch("garnett.utils.time.monotonic", return_value=1000):
+                self.assertTrue(is_valid_language("de"))
+                languages.return_value = ["en"]
+            with patch("garnett.utils.time.monotonic", return_value=1059):
+                self.assertTrue(is_valid_language("de"))
+            with patch("garnett.utils.time.monotonic", return_value=1060):
+                self.assertFalse(is_valid_language("de"))
+            self.assertEqual(languages.call_count, 2)
+
+
+class TestFallbackChains(TestCase):
+    def test_parent_tags(self):
+        self.assertEqual(parent_tags("zh-Hant-TW"), ("zh-Hant", "zh"))
+        self.assertEqual(parent_tags("en"), ())
+
+    @override_settings(
+        GARNETT_TRANSLATABLE_LANGUAGES=["de", "fr", "fr-CA", "en", "zh-Hant-TW"],
+        GARNETT_DEFAULT_TRANSLATABLE_LANGUAGE="en",
+    )
+    def test_derived_chains(self):
+        registry = get_language_registry()
+        self.assertEqual(
+            registry.fallbacks("fr-CA"), ("fr-CA", "fr", "en", "de", "zh-Hant-TW")
+        )
+        self.assertEqual(
+            registry.fallbacks("de"), ("de", "en", "fr", "fr-CA", "zh-Hant-TW")
+        )
+        self.assertEqual(registry.fallbacks("zh-Hant-TW")[:2], ("zh-Hant-TW", "en"))
+        # Every chain is compiled once
+        self.assertIs(registry.fallbacks("fr-CA"), registry.fallbacks("fr-CA"))
+        # Languages outside the registry get a chain from their parents too
+        self.assertEqual(get_fallback_languages("fr-BE")[:3], ("fr-BE", "fr", "en"))
+
+    @override_settings(
+        GARNETT_TRANSLATABLE_LANGUAGES=["en", "fr", "fr-CA"],
+        GARNETT_FALLBACK_CHAINS={"fr_ca": ["en-au", "en"], "es": ["fr"]},
+    )
+    def test_configured_chains(self):
+        self.assertEqual(get_fallback_languages("fr-CA"), ("fr-CA", "en-AU", "en"))
+        self.assertEqual(get_fallback_languages("es"), ("es", "fr"))
+        self.assertEqual(get_fallback_languages("fr"), ("fr", "en", "fr-CA"))
+
+    def test_invalid_chains(self):
+        for chains in [["en"], {"fr": "en"}]:
+            with override_settings(GARNETT_FALLBACK_CHAINS=chains):
+                with self.assertRaises(ImproperlyConfigured):
+                    get_language_registry()
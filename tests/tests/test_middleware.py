@@ -1,12 +1,32 @@
-from django.test import Client, TestCase, RequestFactory
-from django.http import HttpResponse, Http404
+import threading
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.handlers.asgi import ASGIHandler
+from django.test import (
+    AsyncRequestFactory,
+    Client,
+    TestCase,
+    RequestFactory,
+    override_settings,
+)
+from django.http import HttpResponse, Http404, StreamingHttpResponse
+from django.urls import path
+from langcodes import Language
+from mock import patch
 
 from garnett.middleware import (
     TranslationContextMiddleware,
     TranslationContextNotFoundMiddleware,
     TranslationCacheMiddleware,
+    TranslationSignedCookieCacheMiddleware,
+    parse_language_tag,
+    parse_unknown_language_tag,
 )
-from garnett.utils import get_current_language_code
+from garnett.context import set_field_language
+from garnett.utils import get_current_language_code, get_language_registry
+from library_app.models import Book
+from tests.test_models import book_data
 
 
 class TestTranslationContextMiddleware(TestCase):
@@ -43,6 +63,80 @@ class TestTranslationContextMiddleware(TestCase):
         with self.assertRaises(Http404):
             self.not_found_middleware(self.factory.get("/home?glang=notalang"))
 
+    def test_selectors_are_imported_once(self):
+        with override_settings(
+            GARNETT_REQUEST_LANGUAGE_SELECTORS=["garnett.selectors.cookie"]
+        ):
+            with patch("garnett.middleware._language_selectors", None), patch(
+                "garnett.middleware.import_string"
+            ) as import_string:
+                import_string.return_value.return_value = "de"
+                middleware = TranslationContextMiddleware(
+                    lambda r: HttpResponse(get_current_language_code())
+                )
+                for _ in range(3):
+                    response = middleware(self.factory.get("/home"))
+                    self.assertEqual(response.content, b"de")
+        self.assertEqual(import_string.call_count, 1)
+
+    def test_selectors_rebuilt_on_setting_changed(self):
+        def test_view(request):
+            return HttpResponse(get_current_language_code())
+
+        middleware = TranslationContextMiddleware(test_view)
+        request = self.factory.get("/home?glang=de", HTTP_X_GARNETT_LANGUAGE_CODE="fr")
+        self.assertEqual(middleware(request).content, b"fr")
+        with override_settings(
+            GARNETT_REQUEST_LANGUAGE_SELECTORS=["garnett.selectors.query"]
+        ):
+            self.assertEqual(middleware(request).content, b"de")
+        self.assertEqual(middleware(request).content, b"fr")
+
+    def test_force_blank_paths(self):
+        def test_view(request):
+            return HttpResponse(str(request.garnett_fallback_blank))
+
+        middleware = TranslationContextMiddleware(test_view)
+        with override_settings(GARNETT_FORCE_BLANK_FALLBACK_OVERRIDE_PATHS=["/api/"]):
+            self.assertEqual(
+                middleware(self.factory.get("/api/books")).content, b"True"
+            )
+            self.assertEqual(middleware(self.factory.get("/books")).content, b"False")
+        self.assertEqual(middleware(self.factory.get("/api/books")).content, b"False")
+
+    def test_language_tag_cache_is_bounded(self):
+        parse_unknown_language_tag.cache_clear()
+        for tag in ["en-x-0", "fr-CA-1901", "qqq-0000"]:
+            self.not_found_middleware.selectors = [lambda r: tag]
+            with self.assertRaises(Http404):
+                self.not_found_middleware(self.factory.get("/home"))
+        sizes = len(Language._PARSE_CACHE), len(Language._INSTANCES)
+
+        for i in range(1000):
+            for pattern in ["en-x-{}", "fr-CA-{:04d}", "qqq-{:04d}"]:
+                tag = pattern.format(i)
+                self.not_found_middleware.selectors = [lambda r: tag]
+                with self.assertRaises(Http404):
+                    self.not_found_middleware(self.factory.get("/home"))
+        info = parse_unknown_language_tag.cache_info()
+        self.assertEqual(info.currsize, info.maxsize)
+        self.assertEqual((len(Language._PARSE_CACHE), len(Language._INSTANCES)), sizes)
+
+    def test_unsupported_language_message(self):
+        self.not_found_middleware.selectors = [lambda r: "fr-CA-x-1"]
+        with self.assertRaisesMessage(Http404, "français (Canada) [French (Canada)]"):
+            self.not_found_middleware(self.factory.get("/home"))
+        self.not_found_middleware.selectors = [lambda r: "zzz-x-1"]
+        with self.assertRaisesMessage(Http404, "zzz-x-1 [zzz-x-1]"):
+            self.not_found_middleware(self.factory.get("/home"))
+
+    def test_known_language_tags_are_not_parsed(self):
+        parse_unknown_language_tag.cache_clear()
+        language = parse_language_tag("de")
+        self.assertIs(language, get_language_registry().by_tag["de"])
+        self.assertEqual(parse_unknown_language_tag.cache_info().currsize, 0)
+        self.assertIs(parse_language_tag("DE"), language)
+
 
 class TestTranslationCacheMiddleware(TestCase):
     def setUp(self):
@@ -61,3 +155,191 @@ class TestTranslationCacheMiddleware(TestCase):
         """Test that the cache middleware still returns response if no session"""
         response = self.middleware(self.factory.get("/home"))
         self.assertEqual(response.content, b"Nice")
+
+    @override_settings(
+        ROOT_URLCONF=__name__,
+        SESSION_ENGINE="django.contrib.sessions.backends.db",
+        MIDDLEWARE=[
+            "django.contrib.sessions.middleware.SessionMiddleware",
+            "garnett.middleware.TranslationContextMiddleware",
+            "garnett.middleware.TranslationCacheMiddleware",
+        ],
+        GARNETT_REQUEST_LANGUAGE_SELECTORS=[
+            "garnett.selectors.query",
+            "garnett.selectors.session",
+        ],
+    )
+    def test_session_only_saved_on_change(self):
+        client = Client()
+        with patch.object(
+            SessionStore, "save", autospec=True, side_effect=SessionStore.save
+        ) as save:
+            response = client.get("/language/", {"glang": "de"})
+            self.assertEqual(response.content, b"de")
+            # Creating a session saves it once from create() and once from the middleware
+            self.assertTrue(save.called)
+            saves = save.call_count
+
+            for _ in range(10):
+                response = client.get("/language/")
+                self.assertEqual(response.content, b"de")
+                self.assertNotIn("sessionid", response.cookies)
+            response = client.get("/language/", {"glang": "de"})
+            self.assertEqual(save.call_count, saves)
+
+            response = client.get("/language/", {"glang": "fr"})
+            self.assertEqual(response.content, b"fr")
+            self.assertEqual(save.call_count, saves + 1)
+        self.assertEqual(client.session["GARNETT_LANGUAGE_CODE"], "fr")
+
+    @override_settings(
+        ROOT_URLCONF=__name__,
+        SESSION_ENGINE="django.contrib.sessions.backends.db",
+        MIDDLEWARE=[
+            "django.contrib.sessions.middleware.SessionMiddleware",
+            "garnett.middleware.TranslationContextMiddleware",
+            "garnett.middleware.TranslationCacheMiddleware",
+        ],
+    )
+    def test_view_sees_session_value(self):
+        client = Client()
+        response = client.get("/session/", {"glang": "de"})
+        self.assertEqual(response.content, b"de")
+        response = client.get("/session/", {"glang": "fr"})
+        self.assertEqual(response.content, b"fr")
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    MIDDLEWARE=[
+        "garnett.middleware.TranslationContextMiddleware",
+        "garnett.middleware.TranslationSignedCookieCacheMiddleware",
+    ],
+    GARNETT_REQUEST_LANGUAGE_SELECTORS=[
+        "garnett.selectors.query",
+        "garnett.selectors.signed_cookie",
+    ],
+)
+class TestTranslationSignedCookieCacheMiddleware(TestCase):
+    def test_cookie_only_set_on_change(self):
+        client = Client()
+        response = client.get("/language/", {"glang": "de"})
+        self.assertIn("GARNETT_SIGNED_LANGUAGE_CODE", response.cookies)
+
+        for _ in range(10):
+            response = client.get("/language/")
+            self.assertEqual(response.content, b"de")
+            self.assertNotIn("GARNETT_SIGNED_LANGUAGE_CODE", response.cookies)
+
+        response = client.get("/language/", {"glang": "fr"})
+        self.assertIn("GARNETT_SIGNED_LANGUAGE_CODE", response.cookies)
+        self.assertEqual(client.get("/language/").content, b"fr")
+
+    def test_tampered_cookie_ignored(self):
+        client = Client()
+        client.cookies["GARNETT_SIGNED_LANGUAGE_CODE"] = "de"
+        response = client.get("/language/")
+        self.assertEqual(response.content, b"en")
+        self.assertIn("GARNETT_SIGNED_LANGUAGE_CODE", response.cookies)
+
+    def test_cookie_middleware_fails_safely(self):
+        middleware = TranslationSignedCookieCacheMiddleware(
+            lambda r: HttpResponse("Nice")
+        )
+        with self.assertLogs("garnett.middleware", "ERROR"):
+            response = middleware(RequestFactory().get("/home"))
+        self.assertEqual(response.content, b"Nice")
+        self.assertEqual(response.cookies, {})
+
+
+def language_view(request):
+    return HttpResponse(get_current_language_code())
+
+
+def session_language_view(request):
+    return HttpResponse(request.session.get("GARNETT_LANGUAGE_CODE", ""))
+
+
+async def async_language_view(request):
+    return HttpResponse(get_current_language_code())
+
+
+async def async_streaming_view(request):
+    async def content():
+        async for book in Book.objects.order_by("pk").aiterator():
+            yield f"{get_current_language_code()}:{book.title}\n"
+
+    return StreamingHttpResponse(content())
+
+
+urlpatterns = [
+    path("language/", language_view),
+    path("session/", session_language_view),
+    path("async/", async_language_view),
+    path("async/books/", async_streaming_view),
+]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    MIDDLEWARE=[
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "garnett.middleware.TranslationContextNotFoundMiddleware",
+        "garnett.middleware.TranslationCacheMiddleware",
+    ],
+)
+class TestAsyncMiddleware(TestCase):
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+        with set_field_language("en"):
+            Book.objects.create(**{**book_data, "title": {"en": "Book", "de": "Buch"}})
+
+    async def test_async_view(self):
+        thread = threading.get_ident()
+
+        async def view(request):
+            self.assertEqual(threading.get_ident(), thread)
+            return HttpResponse(get_current_language_code())
+
+        middleware = TranslationContextMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(self.factory.get("/home?glang=de"))
+        self.assertEqual(response.content, b"de")
+        self.assertEqual(get_current_language_code(), "en")
+
+        cache_middleware = TranslationCacheMiddleware(view)
+        self.assertTrue(iscoroutinefunction(cache_middleware))
+        request = self.factory.get("/home")
+        request.garnett_language = "fr"
+        request.session = {}
+        await cache_middleware(request)
+        self.assertEqual(request.session["GARNETT_LANGUAGE_CODE"], "fr")
+
+    @override_settings(DEBUG=True)
+    def test_no_thread_switch(self):
+        # Django logs each middleware it has to adapt to async with a thread switch
+        with self.assertNoLogs("django.request", "DEBUG"):
+            ASGIHandler().load_middleware(is_async=True)
+
+    def test_sync_view(self):
+        middleware = TranslationContextMiddleware(lambda r: HttpResponse("Nice"))
+        self.assertFalse(iscoroutinefunction(middleware))
+
+    async def test_async_client(self):
+        response = await self.async_client.get("/async/", {"glang": "de"})
+        self.assertEqual(response.content, b"de")
+        response = await self.async_client.get("/async/", {"glang": "notalang"})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_streaming_response(self):
+        response = await self.async_client.get("/async/books/", {"glang": "de"})
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(content, b"de:Buch\n")
+
+    def test_sync_streaming_response(self):
+        def view(request):
+            return StreamingHttpResponse(get_current_language_code() for _ in range(2))
+
+        middleware = TranslationContextMiddleware(view)
+        response = middleware(RequestFactory().get("/home?glang=fr"))
+        self.assertEqual(b"".join(response.streaming_content), b"frfr")
@@ -1,9 +1,14 @@
+from functools import partial
+
 from django.db import models
+from django.db.models import F
 from django.test import TestCase
+from mock import patch
 
 from garnett.expressions import L, LangF
-from garnett.context import set_field_language
-from garnett.fields import TranslatedField
+from garnett.context import intern_translations, set_field_language
+from garnett.fields import TranslatedField, resolve_many
+from garnett.translatedstr import TranslatedStr
 from library_app.models import Book, RANDOM_STR, BLEACH_STR
 
 book_data = dict(
@@ -36,6 +41,20 @@ class TestModelChanges(TestCase):
             ["de", "en", "fr"],
         )
 
+    def test_translatable_fields(self):
+        self.assertEqual(
+            [field.name for field in self.book.translatable_fields],
+            ["title", "description", "other_info"],
+        )
+        self.assertIs(self.book.translatable_fields, Book().translatable_fields)
+
+    def test_translations(self):
+        translations = self.book.translations
+        self.assertEqual(translations.title, book_data["title"])
+        self.assertEqual(translations.description, book_data["description"])
+        self.assertIs(type(translations), type(Book().translations))
+        self.assertFalse(hasattr(translations, "__dict__"))
+
 
 class TestQuerySet(TestCase):
     def setUp(self):
@@ -53,3 +72,283 @@ class TestQuerySet(TestCase):
         with set_field_language("de"):
             titles = list(Book.objects.all().values(L("title")))
             self.assertEqual(titles, [{"title": book_data["title"]["de"]}])
+
+
+class TestTranslatorCache(TestCase):
+    def setUp(self):
+        with set_field_language("en"):
+            self.book = Book(**book_data)
+            self.book.save()
+
+        self.book = Book.objects.get(pk=self.book.pk)
+
+    def test_repeated_reads_are_cached(self):
+        with set_field_language("en"):
+            title = self.book.title
+            self.assertIs(self.book.title, title)
+            self.assertEqual(title, book_data["title"]["en"])
+
+        with set_field_language("de"):
+            self.assertEqual(self.book.title, book_data["title"]["de"])
+
+        with set_field_language("en", force_blank=True):
+            self.assertEqual(self.book.description, book_data["description"]["en"])
+        with set_field_language("de", force_blank=True):
+            self.assertEqual(self.book.description, "")
+        with set_field_language("de"):
+            self.assertTrue(self.book.description.is_fallback)
+
+    def test_setter_invalidates_cache(self):
+        with set_field_language("en"):
+            self.assertEqual(self.book.title, book_data["title"]["en"])
+            self.book.title = "A better book"
+            self.assertEqual(self.book.title, "A better book")
+
+    def test_reassignment_invalidates_cache(self):
+        with set_field_language("en"):
+            self.assertEqual(self.book.title, book_data["title"]["en"])
+            self.book.title_tsall = {"en": "A different book"}
+            self.assertEqual(self.book.title, "A different book")
+
+            Book.objects.filter(pk=self.book.pk).update(title={"en": "Updated"})
+            self.book.refresh_from_db()
+            self.assertEqual(self.book.title, "Updated")
+
+    def test_change_in_place_invalidates_cache(self):
+        with set_field_language("en"):
+            title = self.book.title
+            self.book.title_tsall["en"] = "Changed"
+            self.assertEqual(self.book.title, "Changed")
+            self.assertEqual(self.book.title.content["en"], "Changed")
+            self.assertIn("Changed", self.book.title.translations.values())
+            self.assertEqual(title, book_data["title"]["en"])
+
+    def test_cache_is_not_pickled(self):
+        import copy
+        import pickle
+
+        with set_field_language("en"):
+            self.assertEqual(self.book.title, book_data["title"]["en"])
+            book = pickle.loads(pickle.dumps(self.book))
+            self.assertEqual(book.title, book_data["title"]["en"])
+
+            book = copy.deepcopy(self.book)
+            book.title = "A copied book"
+            self.assertEqual(book.title, "A copied book")
+            self.assertEqual(self.book.title, book_data["title"]["en"])
+
+
+class TestOnlyLanguages(TestCase):
+    def setUp(self):
+        with set_field_language("en"):
+            self.book = Book.objects.create(**book_data)
+
+    def test_only_current_language(self):
+        with set_field_language("de"):
+            book = Book.objects.only_languages().get(pk=self.book.pk)
+            self.assertEqual(book.title_tsall, {"de": book_data["title"]["de"]})
+            self.assertEqual(book.description_tsall, {})
+            self.assertEqual(book.title, book_data["title"]["de"])
+            self.assertEqual(book.author, book_data["author"])
+            self.assertEqual(book.get_deferred_fields(), set())
+
+    def test_only_languages_with_fallbacks(self):
+        with set_field_language("fr"):
+            book = Book.objects.only_languages("de", fallbacks=True).get()
+        self.assertEqual(book.title_tsall, book_data["title"])
+        self.assertEqual(book.description_tsall, {"en": book_data["description"]["en"]})
+
+    def test_save_keeps_other_languages(self):
+        with set_field_language("de"):
+            book = Book.objects.only_languages().get()
+            book.title = "Ein besseres Buch"
+            book.description = "Ein Buch"
+            book.save()
+
+        book = Book.objects.get()
+        self.assertEqual(
+            book.title_tsall, {"en": "A good book", "de": "Ein besseres Buch"}
+        )
+        self.assertEqual(
+            book.description_tsall, {**book_data["description"], "de": "Ein Buch"}
+        )
+
+    def test_assigning_all_languages_replaces_them(self):
+        with set_field_language("de"):
+            book = Book.objects.only_languages().get()
+            book.title = {"de": "Nur Deutsch"}
+            book.save()
+
+        self.assertEqual(Book.objects.get().title_tsall, {"de": "Nur Deutsch"})
+
+    def test_values_are_unaffected(self):
+        with set_field_language("de"):
+            titles = list(Book.objects.only_languages().values(L("title")))
+        self.assertEqual(titles, [{"title": book_data["title"]["de"]}])
+
+
+decode = TranslatedField.decode_db_value
+
+
+class TestLazyTranslations(TestCase):
+    def setUp(self):
+        with set_field_language("en"):
+            self.book = Book.objects.create(**book_data)
+
+    def test_decoded_when_read(self):
+        with patch.object(
+            TranslatedField, "decode_db_value", autospec=True, side_effect=decode
+        ) as decode_db_value:
+            book = Book.objects.lazy_translations().get()
+            self.assertEqual(book.author, book_data["author"])
+            decode_db_value.assert_not_called()
+
+            self.assertEqual(book.title_tsall, book_data["title"])
+            self.assertEqual(decode_db_value.call_count, 1)
+            with set_field_language("fr"):
+                self.assertEqual(book.description, book_data["description"]["fr"])
+            self.assertEqual(book.description_tsall, book_data["description"])
+            self.assertEqual(decode_db_value.call_count, 2)
+
+    def test_other_queries_are_unaffected(self):
+        for book in Book.objects.lazy_translations().iterator():
+            titles = list(Book.objects.values_list("title", flat=True))
+            self.assertEqual(titles, [book_data["title"]])
+        annotated = Book.objects.lazy_translations().annotate(t=F("title")).get()
+        self.assertEqual(annotated.t, book_data["title"])
+
+    def test_save(self):
+        book = Book.objects.lazy_translations().get()
+        self.assertEqual(book.get_changed_translated_fields(), [])
+        book.title_tsall["fr"] = "Un bon livre"
+        self.assertEqual(
+            [field.name for field in book.get_changed_translated_fields()], ["title"]
+        )
+        book.save()
+        self.assertEqual(
+            Book.objects.get().title_tsall, {**book_data["title"], "fr": "Un bon livre"}
+        )
+
+    def test_copy_and_pickle(self):
+        import copy
+        import pickle
+
+        data = pickle.dumps(Book.objects.lazy_translations().get())
+        self.assertNotIn(b"LazyTranslations", data)
+        self.assertEqual(pickle.loads(data).title_tsall, book_data["title"])
+        book = copy.deepcopy(Book.objects.lazy_translations().get())
+        self.assertEqual(book.title_tsall, book_data["title"])
+
+    def test_not_a_data_descriptor(self):
+        book = Book.objects.lazy_translations().get()
+        self.assertNotIn("title_tsall", book.__dict__)
+        self.assertEqual(book.title_tsall, book_data["title"])
+        self.assertIs(book.__dict__["title_tsall"], book.title_tsall)
+        self.assertFalse(hasattr(type(Book.title_tsall), "__set__"))
+
+    def test_refresh_from_db(self):
+        book = Book.objects.lazy_translations().get()
+        Book.objects.update(title={"en": "Changed"})
+        book.refresh_from_db()
+        self.assertEqual(book.title_tsall, {"en": "Changed"})
+
+
+class TestResolveMany(TestCase):
+    def setUp(self):
+        with set_field_language("en"):
+            Book.objects.create(**book_data)
+            Book.objects.create(**{**book_data, "title": {"en": "Another book"}})
+
+    def test_resolve_many(self):
+        books = list(Book.objects.order_by("pk"))
+        with patch.object(
+            TranslatedStr, "for_language", side_effect=TranslatedStr.for_language
+        ) as for_language:
+            resolve_many(books, fields=["title"], language="de")
+        self.assertEqual(for_language.call_count, 2)
+
+        with patch.object(TranslatedField, "translate") as translate:
+            with set_field_language("de"):
+                self.assertEqual(books[0].title, book_data["title"]["de"])
+                self.assertTrue(books[1].title.is_fallback)
+                self.assertTrue(books[1].description.is_fallback)
+            translate.assert_not_called()
+
+        # Resolved values aren't used in another language
+        with set_field_language("en"):
+            self.assertEqual(books[0].title, book_data["title"]["en"])
+
+    def test_fallback_function(self):
+        field = Book._meta.get_field("title")
+        with patch.object(
+            field, "fallback", partial(TranslatedStr, fallback=lambda c: (None, "?"))
+        ):
+            (book,) = resolve_many(
+                Book.objects.filter(title__en="Another book"), language="fr"
+            )
+            with set_field_language("fr"):
+                self.assertEqual(book.title, "?")
+
+    def test_deferred_fields_are_skipped(self):
+        books = resolve_many(Book.objects.defer("title").order_by("pk"), language="de")
+        with self.assertNumQueries(2):
+            with set_field_language("de"):
+                self.assertEqual(
+                    [str(book.title) for book in books],
+                    [book_data["title"]["de"], "Another book"],
+                )
+
+    def test_resolved_translations(self):
+        queryset = Book.objects.order_by("pk").resolved_translations("title")
+        with patch.object(
+            TranslatedField,
+            "translate",
+            autospec=True,
+            side_effect=TranslatedField.translate,
+        ) as translate:
+            books = list(queryset.filter(number_of_pages=100))
+            self.assertEqual(translate.call_count, 2)
+            self.assertEqual(
+                [book.title for book in books],
+                [book_data["title"]["en"], "Another book"],
+            )
+            self.assertEqual(translate.call_count, 2)
+
+            # Other translated fields and iterator() aren't resolved
+            self.assertEqual(books[0].description, book_data["description"]["en"])
+            self.assertEqual(translate.call_count, 2)
+            list(queryset.iterator())
+            self.assertEqual(translate.call_count, 2)
+
+            book = Book.objects.resolved_translations(language="de").first()
+            self.assertEqual(translate.call_count, 5)
+            with set_field_language("de"):
+                self.assertEqual(book.title, book_data["title"]["de"])
+            self.assertEqual(translate.call_count, 5)
+
+
+class TestInternTranslations(TestCase):
+    def setUp(self):
+        with set_field_language("en"):
+            for pages in [100, 200, 300]:
+                Book.objects.create(**{**book_data, "number_of_pages": pages})
+
+    def test_translations_are_shared(self):
+        with intern_translations():
+            first, second, third = Book.objects.order_by("pk")
+        self.assertIs(first.title_tsall["de"], second.title_tsall["de"])
+        self.assertIs(first.description_tsall["fr"], third.description_tsall["fr"])
+        self.assertIs(next(iter(first.title_tsall)), next(iter(second.title_tsall)))
+        # Each row still has its own dictionary
+        self.assertIsNot(first.title_tsall, second.title_tsall)
+        first.title_tsall["de"] = "Ein anderes Buch"
+        self.assertEqual(second.title_tsall, book_data["title"])
+
+        first, second, _ = Book.objects.order_by("pk")
+        self.assertIsNot(first.title_tsall["de"], second.title_tsall["de"])
+
+    def test_table_is_bounded(self):
+        with intern_translations(max_size=1):
+            first, second, _ = Book.objects.order_by("pk")
+        self.assertIs(first.title_tsall["en"], second.title_tsall["en"])
+        self.assertIsNot(first.title_tsall["de"], second.title_tsall["de"])
@@ -1,10 +1,20 @@
+import django
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import SearchQuery
 from django.db import connection
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-from unittest import skipUnless
+from unittest import skipIf, skipUnless
 
 from garnett.context import set_field_language
-from garnett.lookups import LangTrigramSimilarity
+from garnett.indexes import language_index_name, language_indexes
+from garnett.lookups import LangTrigramDistance, LangTrigramSimilarity
+from garnett.search import (
+    TranslatedSearchRank,
+    TranslatedSearchVector,
+    get_search_config,
+    search_vector_field,
+)
 from library_app.models import Book
 
 from django.contrib.postgres.search import TrigramSimilarity
@@ -18,6 +28,52 @@ def lang_similar_qs(qs, field, text):
     return qs.annotate(similarity=LangTrigramSimilarity(field, text))
 
 
+class TestSearchConfig(TestCase):
+    def test_search_configs(self):
+        self.assertEqual(get_search_config("en"), "english")
+        self.assertEqual(get_search_config("en-AU"), "english")
+        self.assertEqual(get_search_config("de-at"), "german")
+        self.assertEqual(get_search_config("tlh"), "simple")
+
+    @override_settings(GARNETT_SEARCH_CONFIGS={"tlh": "klingon", "en-au": "strayan"})
+    def test_custom_search_configs(self):
+        self.assertEqual(get_search_config("tlh"), "klingon")
+        self.assertEqual(get_search_config("en-AU"), "strayan")
+        self.assertEqual(get_search_config("en"), "english")
+
+    def test_search_vector(self):
+        with set_field_language("de"):
+            vector = TranslatedSearchVector("title")
+        self.assertEqual(vector.language, "de")
+        self.assertEqual(vector.config.config.value, "german")
+
+    def test_search_indexes(self):
+        field = Book._meta.get_field("title")
+        btree, search = language_indexes(Book, field, ["fr"], ["btree", "search"])
+        self.assertIsInstance(search, GinIndex)
+        (vector,) = search.expressions
+        self.assertEqual(
+            vector.deconstruct(),
+            ("garnett.search.TranslatedSearchVector", ("title", "fr", "french"), {}),
+        )
+        self.assertNotEqual(btree.name, search.name)
+
+    def test_trigram_indexes(self):
+        field = Book._meta.get_field("title")
+        (index,) = language_indexes(Book, field, ["fr"], ["gist_trgm"])
+        self.assertIsInstance(index, GistIndex)
+
+    def test_trigram_nearest_takes_one_field(self):
+        with self.assertRaises(TypeError):
+            Book.objects.trigram_nearest(title="a", description="b")
+
+    @skipIf(django.VERSION < (5, 0), "Generated fields require Django 5.0")
+    def test_search_vector_field(self):
+        field = search_vector_field("title", "de")
+        self.assertTrue(field.db_persist)
+        self.assertEqual(field.expression.config.config.value, "german")
+
+
 @skipUnless(connection.vendor == "postgresql", "Search only works on Postgres")
 class TestPGSearchLookups(TestCase):
     @set_field_language("en")
@@ -83,3 +139,74 @@ class TestPGSearchLookups(TestCase):
             )
 
         self.assertTrue(de_similarity > en_similarity)
+
+    def test_search_stemming(self):
+        books = Book.objects.all()
+        with set_field_language("en"):
+            # Stemmed with the english config
+            self.assertTrue(books.filter(title__search="books").exists())
+            # A query with a config uses that config
+            self.assertTrue(
+                books.filter(
+                    title__search=SearchQuery("good", config="simple")
+                ).exists()
+            )
+
+    def test_search_rank(self):
+        Book.objects.create(
+            title={"en": "A book about a book"}, description={}, number_of_pages=1
+        )
+        with set_field_language("en"):
+            books = (
+                Book.objects.filter(title__search="book")
+                .annotate(rank=TranslatedSearchRank("title", "book"))
+                .order_by("-rank")
+            )
+            self.assertEqual(books.count(), 2)
+            self.assertEqual(books[0].title, "A book about a book")
+
+    def test_search_uses_index(self):
+        field = Book._meta.get_field("title")
+        indexes = language_indexes(Book, field, ["de"], ["search"])
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.add_index(Book, index)
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+        name = language_index_name(Book._meta.db_table, "title", "de", "search")
+        with set_field_language("de"):
+            self.assertIn(name, Book.objects.filter(title__search="buch").explain())
+
+    def test_trigram_nearest(self):
+        Book.objects.create(
+            title={"en": "A good look", "de": "Ein gut buch"},
+            description={},
+            number_of_pages=1,
+        )
+        with set_field_language("en"):
+            books = Book.objects.trigram_nearest(title="good boo")
+            self.assertEqual(books[0].title, "A good book")
+            self.assertLess(books[0].trigram_distance, books[1].trigram_distance)
+
+            books = Book.objects.annotate(
+                distance=LangTrigramDistance("title", "good look")
+            ).order_by("distance")
+            self.assertEqual(books[0].title, "A good look")
+
+        books = Book.objects.trigram_nearest(title__de="eine gut buck")
+        self.assertEqual(books[0].title_tsall["de"], "Eine gut buch")
+
+    def test_trigram_nearest_uses_index(self):
+        field = Book._meta.get_field("title")
+        indexes = language_indexes(Book, field, ["en"], ["gist_trgm"])
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.add_index(Book, index)
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+        name = language_index_name(Book._meta.db_table, "title", "en", "gist_trgm")
+        with set_field_language("en"):
+            plan = Book.objects.trigram_nearest(title="good")[:10].explain()
+        self.assertIn(f"Index Scan using {name}", plan)
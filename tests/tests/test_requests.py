@@ -1,7 +1,14 @@
-from django.test import TestCase, override_settings
-from mock import Mock
+from django.test import RequestFactory, TestCase, override_settings
+from langcodes import Language
+from mock import Mock, patch
 
 from garnett.middleware import get_language_from_request
+from garnett.selectors import (
+    accept_language,
+    match_accept_language,
+    parse_accept_language,
+)
+from garnett.utils import get_language_registry
 
 
 class TestUtils(TestCase):
@@ -35,3 +42,64 @@ class TestUtils(TestCase):
             ]
         ):
             self.assertTrue(get_language_from_request(request), "fr")
+
+
+class TestAcceptLanguage(TestCase):
+    def setUp(self):
+        match_accept_language.cache_clear()
+        self.factory = RequestFactory()
+
+    def test_parse_accept_language(self):
+        self.assertEqual(
+            parse_accept_language("fr-CH, fr;q=0.9, en;q=0.8, de;q=0.7, *;q=0.5"),
+            ["fr-CH", "fr", "en", "de"],
+        )
+        self.assertEqual(
+            parse_accept_language("de;q=0.5, en-GB, es;q=0, it;q=x, tlh"),
+            ["en-GB", "tlh", "de"],
+        )
+        self.assertEqual(parse_accept_language(""), [])
+
+    def test_accept_language(self):
+        for accept, expected in [
+            ("de-CH, de;q=0.9, en;q=0.8", "de"),
+            ("en-US,en;q=0.9", "en"),
+            ("en-AU", "en-AU"),
+            ("fr-CA;q=0.5, ja, pt-BR;q=0.8", "fr"),
+            ("es, ja", None),
+            ("not a language, tlh;q=0.1", "tlh"),
+        ]:
+            with self.subTest(accept):
+                request = self.factory.get("/", HTTP_ACCEPT_LANGUAGE=accept)
+                self.assertEqual(accept_language(request), expected)
+        self.assertIsNone(accept_language(self.factory.get("/")))
+
+    @override_settings(
+        GARNETT_REQUEST_LANGUAGE_SELECTORS=["garnett.selectors.accept_language"]
+    )
+    def test_matches_are_cached(self):
+        request = self.factory.get("/", HTTP_ACCEPT_LANGUAGE="gsw, en;q=0.5")
+        with patch(
+            "garnett.selectors.langcodes.closest_match", return_value=("de", 1)
+        ) as closest_match:
+            for _ in range(3):
+                self.assertEqual(get_language_from_request(request).to_tag(), "de")
+        self.assertEqual(closest_match.call_count, 1)
+
+        # The cache follows the translatable languages
+        with override_settings(GARNETT_TRANSLATABLE_LANGUAGES=["en", "fr"]):
+            self.assertEqual(get_language_from_request(request).to_tag(), "en")
+
+    def test_parents_are_matched_without_langcodes(self):
+        with patch("garnett.selectors.langcodes.closest_match") as closest_match:
+            for accept in ["de-AT", "EN-au", "de-CH-1996", "de-x-custom"]:
+                self.assertIsNotNone(match_accept_language(accept, ("en-AU", "de")))
+        closest_match.assert_not_called()
+
+    def test_language_caches_are_bounded(self):
+        tags = tuple(get_language_registry().by_tag)
+        match_accept_language("qqq-0000, gsw-x-0", tags)
+        sizes = len(Language._PARSE_CACHE), len(Language._INSTANCES)
+        for i in range(2000):
+            match_accept_language(f"qqq-{i:04d}, gsw-x-{i}, zz-x-{i}", tags)
+        self.assertEqual((len(Language._PARSE_CACHE), len(Language._INSTANCES)), sizes)
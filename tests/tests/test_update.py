@@ -1,7 +1,10 @@
+from django.db import connection, transaction
+from django.db.models.signals import post_save
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from garnett.context import set_field_language
-from library_app.models import Book
+from library_app.models import Book, DefaultBook
 
 
 class TestUpdates(TestCase):
@@ -66,3 +69,236 @@ class TestUpdates(TestCase):
                 book2.title_tsall,
                 {"en": "New English Title", "de": "Eine Gut Buch"},
             )
+
+    def test_update_translation(self):
+        """Test queryset .update_translation only changes one language"""
+        updated = Book.objects.filter(pk=self.book.pk).update_translation(
+            "title", "DE", "Ein Neues Buch"
+        )
+        self.assertEqual(updated, 1)
+
+        self.book.refresh_from_db()
+        self.assertEqual(
+            self.book.title_tsall, {"en": "A good book", "de": "Ein Neues Buch"}
+        )
+
+        Book.objects.update_translation("title", "fr", "Un Livre")
+        self.book.refresh_from_db()
+        self.assertEqual(
+            self.book.title_tsall,
+            {"en": "A good book", "de": "Ein Neues Buch", "fr": "Un Livre"},
+        )
+
+
+class TestPartialSave(TestCase):
+    def setUp(self):
+        with set_field_language("en"):
+            self.book = Book.objects.create(
+                title={"en": "A good book", "de": "Eine Gut Buch"},
+                author="Someone",
+                description="Its ok i guess",
+                number_of_pages=100,
+            )
+
+    def test_concurrent_language_edits(self):
+        """Test that edits in different languages don't overwrite each other"""
+        english = Book.objects.get(pk=self.book.pk)
+        german = Book.objects.get(pk=self.book.pk)
+
+        with set_field_language("en"):
+            english.title = "A great book"
+        with set_field_language("de"):
+            german.title = "Ein tolles Buch"
+
+        english.save()
+        german.save()
+
+        self.book.refresh_from_db()
+        self.assertEqual(
+            self.book.title_tsall, {"en": "A great book", "de": "Ein tolles Buch"}
+        )
+
+        # Saving again only writes later changes
+        Book.objects.update_translation("title", "en", "A better book")
+        german.save()
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title_tsall["en"], "A better book")
+
+    def test_assigning_all_languages_replaces_them(self):
+        with set_field_language("de"):
+            self.book.title = "Ein tolles Buch"
+        self.book.title = {"fr": "Un bon livre"}
+        self.book.save()
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title_tsall, {"fr": "Un bon livre"})
+
+    def test_changes_to_translations_are_saved(self):
+        self.book.title_tsall = {"en": "A good book"}
+        self.book.save()
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title_tsall, {"en": "A good book"})
+
+    def test_changes_in_place_are_saved(self):
+        """Test that a change to the dictionary isn't lost when a language is also set"""
+        book = Book.objects.get(pk=self.book.pk)
+        book.title_tsall["de"] = "Ein neues Buch"
+        with set_field_language("en"):
+            book.title = "A new book"
+        book.save()
+
+        self.book.refresh_from_db()
+        self.assertEqual(
+            self.book.title_tsall, {"en": "A new book", "de": "Ein neues Buch"}
+        )
+
+    def test_rolled_back_save_is_retried(self):
+        book = Book.objects.get(pk=self.book.pk)
+        with set_field_language("en"):
+            book.title = "Retry"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    book.save()
+                    raise ValueError
+        self.assertEqual(
+            Book.objects.get(pk=book.pk).title_tsall,
+            {"en": "A good book", "de": "Eine Gut Buch"},
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            book.save()
+        self.assertEqual(
+            Book.objects.get(pk=book.pk).title_tsall,
+            {"en": "Retry", "de": "Eine Gut Buch"},
+        )
+
+        # Once committed, later saves only write later changes
+        Book.objects.filter(pk=book.pk).update(title={"en": "Retry", "de": "Hallo"})
+        with set_field_language("fr"):
+            book.title = "Bonjour"
+        book.save()
+        self.assertEqual(
+            Book.objects.get(pk=book.pk).title_tsall,
+            {"en": "Retry", "de": "Hallo", "fr": "Bonjour"},
+        )
+
+    def test_untracked_models_save_whole_fields(self):
+        book = DefaultBook.objects.create(title={"en": "Hello"}, number_of_pages=1)
+        book = DefaultBook.objects.get(pk=book.pk)
+        DefaultBook.objects.filter(pk=book.pk).update(
+            title={"en": "Hello", "de": "Hallo"}
+        )
+        with set_field_language("fr"):
+            book.title = "Bonjour"
+        with self.captureOnCommitCallbacks() as callbacks:
+            book.save()
+        self.assertEqual(callbacks, [])
+        self.assertEqual(
+            DefaultBook.objects.get(pk=book.pk).title_tsall,
+            {"en": "Hello", "fr": "Bonjour"},
+        )
+
+
+class TestChangeTracking(TestCase):
+    def setUp(self):
+        with set_field_language("en"):
+            Book.objects.create(
+                title={"en": "A good book", "de": "Eine Gut Buch"},
+                author="Someone",
+                description="Its ok i guess",
+                number_of_pages=100,
+            )
+        self.book = Book.objects.get()
+
+    def saved_columns(self, book):
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                book.save()
+        (update,) = queries.captured_queries
+        return {
+            field.column
+            for field in Book._meta.concrete_fields
+            if f'"{field.column}"' in update["sql"].split(" WHERE ")[0]
+        }
+
+    def test_unchanged_translations_not_saved(self):
+        self.book.number_of_pages = 200
+        self.assertNotIn("title", self.saved_columns(self.book))
+        self.assertNotIn("description", self.saved_columns(self.book))
+        self.assertIn("number_of_pages", self.saved_columns(self.book))
+
+    def test_changed_translations_saved(self):
+        with set_field_language("de"):
+            self.book.title = "Ein tolles Buch"
+        self.assertEqual(
+            [field.name for field in self.book.get_changed_translated_fields()],
+            ["title"],
+        )
+        columns = self.saved_columns(self.book)
+        self.assertIn("title", columns)
+        self.assertNotIn("description", columns)
+        self.assertEqual(self.book.get_changed_translated_fields(), [])
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title_tsall["de"], "Ein tolles Buch")
+
+    def test_in_place_changes_saved(self):
+        self.book.description_tsall["fr"] = "Pas mal"
+        self.assertIn("description", self.saved_columns(self.book))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.description_tsall["fr"], "Pas mal")
+
+    def test_explicit_update_fields(self):
+        self.book.title = {"en": "A new book"}
+        self.book.save(update_fields=["number_of_pages"])
+        self.book.refresh_from_db()
+        self.assertEqual(
+            self.book.title_tsall, {"en": "A good book", "de": "Eine Gut Buch"}
+        )
+
+    def test_save_as_new(self):
+        self.book.pk = None
+        self.book.save()
+        self.assertEqual(Book.objects.count(), 2)
+        self.assertEqual(
+            Book.objects.get(pk=self.book.pk).title_tsall,
+            {"en": "A good book", "de": "Eine Gut Buch"},
+        )
+
+        self.book.delete()
+        self.book.save()
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_update_fields_only_when_unchanged(self):
+        saved = []
+
+        def receiver(sender, update_fields, **kwargs):
+            saved.append(update_fields)
+
+        post_save.connect(receiver, sender=Book)
+        self.addCleanup(post_save.disconnect, receiver, sender=Book)
+
+        self.book.number_of_pages = 200
+        self.book.save()
+        self.book.title_tsall["fr"] = "Un bon livre"
+        self.book.description_tsall["fr"] = "Pas mal"
+        self.book.other_info = {"fr": "Aucune"}
+        self.book.save()
+        self.assertIsNotNone(saved[0])
+        self.assertNotIn("title", saved[0])
+        self.assertIsNone(saved[1])
+
+    def test_rolled_back_save_is_retried(self):
+        self.book.title_tsall["fr"] = "Un bon livre"
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    self.book.save()
+                    raise ValueError
+        self.assertEqual(self.book.get_changed_translated_fields()[0].name, "title")
+
+        self.book.number_of_pages = 200
+        self.book.save()
+        self.assertEqual(Book.objects.get().title_tsall["fr"], "Un bon livre")